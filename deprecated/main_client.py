@@ -11,9 +11,10 @@ import sys
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 import httpx
+import orjson
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 import uvicorn
 from datetime import datetime
 import logging
@@ -55,13 +56,17 @@ class OllamaAgent:
         # Use the first available model
         model = self.available_models[0]
         
+        # Encode off the event loop; large histories can take a while to serialize
+        market_json = await asyncio.to_thread(orjson.dumps, market_data)
+        earnings_json = await asyncio.to_thread(orjson.dumps, earnings_data) if earnings_data else b""
+        
         # Create analysis prompt
         prompt = f"""
         Analyze the following stock data for {symbol} and provide insights:
         
-        Market Data: {json.dumps(market_data, indent=2)}
+        Market Data: {market_json.decode()}
         
-        {"Earnings Data: " + json.dumps(earnings_data, indent=2) if earnings_data else ""}
+        {"Earnings Data: " + earnings_json.decode() if earnings_data else ""}
         
         Please provide:
         1. Overall market sentiment analysis
@@ -147,7 +152,7 @@ mcp_client = None
 ai_agent = OllamaAgent()
 
 # FastAPI app
-app = FastAPI(title="Calvin Stock Prediction Tool")
+app = FastAPI(title="Calvin Stock Prediction Tool", default_response_class=ORJSONResponse)
 
 # Serve static files (web UI)
 if Path("web").exists():
@@ -3,10 +3,12 @@
 MCP Server for Company Data Management
 Handles S&P 500 company information, sectors, and metadata
 """
-import json
+import heapq
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Union
+import orjson
 from fastmcp import FastMCP
 
 # Initialize MCP server
@@ -15,10 +17,143 @@ mcp = FastMCP("Company Data Server")
 # Base paths for data storage
 ASSETS_DIR = Path(__file__).parent.parent / "assets"
 COMPANIES_DIR = ASSETS_DIR / "sp500_companies"
+INDEX_FILE = COMPANIES_DIR / "_index.json"
+
+# Parsed company files keyed by path, with the mtime they were read at
+_company_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+# Worker threads for reading many company files at once
+_io_pool = ThreadPoolExecutor(max_workers=16)
+
+# Sector -> symbols and symbol -> name, loaded from INDEX_FILE on first use,
+# with the mtime of the file each symbol was indexed from
+_sector_index: Optional[Dict[str, List[str]]] = None
+_name_index: Dict[str, str] = {}
+_index_mtimes: Dict[str, int] = {}
+
+# Lower-cased (symbol, name) per symbol for search_companies
+_search_keys: Dict[str, Tuple[str, str]] = {}
 
 def ensure_directories():
-    """Ensure required directories exist"""
-    COMPANIES_DIR.mkdir(parents=True, exist_ok=True)
+    """Ensure required directories and the company index exist"""
+    if _sector_index is None:
+        COMPANIES_DIR.mkdir(parents=True, exist_ok=True)
+        _refresh_index()
+
+def _company_files() -> List[os.DirEntry]:
+    """
+    List company data files, which are named by upper-case ticker symbol;
+    the index and aggregate files such as sp500_companies.json are skipped
+    """
+    with os.scandir(COMPANIES_DIR) as entries:
+        return [
+            entry for entry in entries
+            if entry.name.endswith(".json") and _is_company_symbol(entry.name[:-len(".json")])
+        ]
+
+def _is_company_symbol(name: str) -> bool:
+    """Whether a file name stem is a ticker symbol rather than an internal file"""
+    return name == name.upper() and not name.startswith("_")
+
+def _load_company(company_file: Union[Path, os.DirEntry]) -> Dict[str, Any]:
+    """Read a company file, reusing the parsed data while the file is unchanged"""
+    key = os.fspath(company_file)
+    mtime_ns = company_file.stat().st_mtime_ns
+    
+    cached = _company_cache.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    with open(company_file, 'rb') as f:
+        company_data = orjson.loads(f.read())
+    _company_cache[key] = (mtime_ns, company_data)
+    return company_data
+
+def _try_load_company(company_file: Union[Path, os.DirEntry]) -> Optional[Dict[str, Any]]:
+    """Like _load_company, but returns None for missing or unreadable files"""
+    try:
+        return _load_company(company_file)
+    except (orjson.JSONDecodeError, FileNotFoundError):
+        return None
+
+def _load_companies(company_files: List[Union[Path, os.DirEntry]]) -> List[Optional[Dict[str, Any]]]:
+    """Read several company files in parallel, in the order given"""
+    return list(_io_pool.map(_try_load_company, company_files))
+
+def _refresh_index():
+    """
+    Bring the sector/name index up to date with the company files
+    
+    The index is read from INDEX_FILE on first use. Files whose mtime differs
+    from the one they were indexed at are re-read, and symbols whose file is
+    gone are dropped, so only changed files are parsed.
+    """
+    global _sector_index, _name_index, _index_mtimes, _search_keys
+    
+    if _sector_index is None:
+        try:
+            index = orjson.loads(INDEX_FILE.read_bytes())
+            _sector_index = index["sectors"]
+            _name_index = index["names"]
+            _index_mtimes = index["mtimes"]
+            _search_keys = {
+                symbol: (symbol.lower(), name.lower())
+                for symbol, name in _name_index.items()
+            }
+        except (orjson.JSONDecodeError, FileNotFoundError, KeyError, TypeError, AttributeError):
+            _sector_index = {}
+            _name_index = {}
+            _index_mtimes = {}
+            _search_keys = {}
+    
+    listing = {entry.name[:-len(".json")]: entry.stat().st_mtime_ns for entry in _company_files()}
+    
+    removed = (_name_index.keys() | _index_mtimes.keys()) - listing.keys()
+    for symbol in removed:
+        _unindex_company(symbol)
+    
+    changed = sorted(symbol for symbol, mtime_ns in listing.items() if _index_mtimes.get(symbol) != mtime_ns)
+    company_files = [COMPANIES_DIR / f"{symbol}.json" for symbol in changed]
+    
+    for symbol, company_data in zip(changed, _load_companies(company_files)):
+        if isinstance(company_data, dict):
+            _index_company(symbol, company_data, listing[symbol])
+        else:
+            # Unreadable; remember the mtime so it is only retried once rewritten
+            _unindex_company(symbol)
+            _index_mtimes[symbol] = listing[symbol]
+    
+    if removed or changed:
+        _write_index()
+
+def _unindex_company(symbol: str):
+    """Remove a company from the in-memory index"""
+    for sector_symbols in _sector_index.values():
+        if symbol in sector_symbols:
+            sector_symbols.remove(symbol)
+    
+    _name_index.pop(symbol, None)
+    _index_mtimes.pop(symbol, None)
+    _search_keys.pop(symbol, None)
+
+def _index_company(symbol: str, company_data: Dict[str, Any], mtime_ns: int):
+    """Add or move a company in the in-memory index"""
+    _unindex_company(symbol)
+    
+    sector = company_data.get('sector')
+    if sector and isinstance(sector, str):
+        _sector_index.setdefault(sector, []).append(symbol)
+    
+    _name_index[symbol] = str(company_data.get('name') or '')
+    _index_mtimes[symbol] = mtime_ns
+    _search_keys[symbol] = (symbol.lower(), _name_index[symbol].lower())
+
+def _write_index():
+    """Atomically persist the index next to the company files"""
+    index = {"sectors": _sector_index, "names": _name_index, "mtimes": _index_mtimes}
+    tmp_file = INDEX_FILE.with_suffix(".tmp")
+    tmp_file.write_bytes(orjson.dumps(index))
+    os.replace(tmp_file, INDEX_FILE)
 
 @mcp.tool()
 async def get_companies(
@@ -42,26 +177,21 @@ async def get_companies(
     companies = []
     
     # Read company files from assets directory
-    for company_file in COMPANIES_DIR.glob("*.json"):
-        try:
-            with open(company_file, 'r') as f:
-                company_data = json.load(f)
-                
-            # Apply filters
-            if sector and company_data.get('sector') != sector:
-                continue
-                
-            if sp500_only and not company_data.get('sp500_constituent', True):
-                continue
-                
-            companies.append(company_data)
+    for company_data in _load_companies(_company_files()):
+        if company_data is None:
+            continue
+            
+        # Apply filters
+        if sector and company_data.get('sector') != sector:
+            continue
             
-        except (json.JSONDecodeError, FileNotFoundError):
+        if sp500_only and not company_data.get('sp500_constituent', True):
             continue
+            
+        companies.append(company_data)
     
-    # Sort by symbol and apply limit
-    companies.sort(key=lambda x: x.get('symbol', ''))
-    companies = companies[:limit]
+    # Take the first `limit` companies by symbol without sorting them all
+    companies = heapq.nsmallest(limit, companies, key=lambda x: x.get('symbol', ''))
     
     return {
         "companies": companies,
@@ -86,14 +216,11 @@ async def get_company_by_symbol(symbol: str) -> Dict[str, Any]:
     symbol = symbol.upper()
     company_file = COMPANIES_DIR / f"{symbol}.json"
     
-    if not company_file.exists():
-        return {"error": f"Company {symbol} not found"}
-    
     try:
-        with open(company_file, 'r') as f:
-            company_data = json.load(f)
-        return company_data
-    except json.JSONDecodeError:
+        return _load_company(company_file)
+    except FileNotFoundError:
+        return {"error": f"Company {symbol} not found"}
+    except orjson.JSONDecodeError:
         return {"error": f"Invalid data for company {symbol}"}
 
 @mcp.tool()
@@ -121,8 +248,12 @@ async def add_company(company_data: Dict[str, Any]) -> Dict[str, Any]:
     company_data.setdefault('last_updated', None)
     
     try:
-        with open(company_file, 'w') as f:
-            json.dump(company_data, f, indent=2)
+        with open(company_file, 'wb') as f:
+            f.write(orjson.dumps(company_data, option=orjson.OPT_INDENT_2))
+        _company_cache.pop(os.fspath(company_file), None)
+        
+        _index_company(symbol, company_data, company_file.stat().st_mtime_ns)
+        _write_index()
         
         return {
             "success": True,
@@ -141,20 +272,13 @@ async def get_sectors() -> Dict[str, Any]:
         Dictionary with sectors list and counts
     """
     ensure_directories()
+    _refresh_index()
     
-    sectors = {}
-    
-    for company_file in COMPANIES_DIR.glob("*.json"):
-        try:
-            with open(company_file, 'r') as f:
-                company_data = json.load(f)
-                
-            sector = company_data.get('sector')
-            if sector:
-                sectors[sector] = sectors.get(sector, 0) + 1
-                
-        except (json.JSONDecodeError, FileNotFoundError):
-            continue
+    sectors = {
+        sector: len(symbols)
+        for sector, symbols in _sector_index.items()
+        if symbols
+    }
     
     return {
         "sectors": list(sectors.keys()),
@@ -175,34 +299,25 @@ async def search_companies(query: str, limit: int = 10) -> Dict[str, Any]:
         Dictionary with matching companies
     """
     ensure_directories()
+    _refresh_index()
     
     query = query.lower()
-    matches = []
     
-    for company_file in COMPANIES_DIR.glob("*.json"):
-        try:
-            with open(company_file, 'r') as f:
-                company_data = json.load(f)
-                
-            symbol = company_data.get('symbol', '').lower()
-            name = company_data.get('name', '').lower()
-            
-            if query in symbol or query in name:
-                matches.append(company_data)
-                
-        except (json.JSONDecodeError, FileNotFoundError):
-            continue
+    # Rank index entries by relevance: exact symbol match first, then symbol
+    # contains query, then alphabetical
+    ranked = [
+        (query != symbol_lower, query not in symbol_lower, symbol)
+        for symbol, (symbol_lower, name_lower) in _search_keys.items()
+        if query in symbol_lower or query in name_lower
+    ]
+    top_files = [COMPANIES_DIR / f"{symbol}.json" for _, _, symbol in heapq.nsmallest(limit, ranked)]
     
-    # Sort by relevance (exact symbol match first, then name matches)
-    matches.sort(key=lambda x: (
-        query != x.get('symbol', '').lower(),  # Exact symbol match first
-        query not in x.get('symbol', '').lower(),  # Symbol contains query
-        x.get('symbol', '')  # Alphabetical
-    ))
+    # Only the returned companies are read from disk
+    top_matches = [company_data for company_data in _load_companies(top_files) if company_data is not None]
     
     return {
-        "matches": matches[:limit],
-        "total_matches": len(matches),
+        "matches": top_matches,
+        "total_matches": len(ranked),
         "query": query
     }
 
@@ -210,20 +325,20 @@ async def search_companies(query: str, limit: int = 10) -> Dict[str, Any]:
 async def companies_resource() -> str:
     """Resource providing current companies list"""
     companies_data = await get_companies(limit=1000)
-    return json.dumps(companies_data, indent=2)
+    return orjson.dumps(companies_data, option=orjson.OPT_INDENT_2).decode()
 
 @mcp.resource("companies://sectors")
 async def sectors_resource() -> str:
     """Resource providing sectors information"""
     sectors_data = await get_sectors()
-    return json.dumps(sectors_data, indent=2)
+    return orjson.dumps(sectors_data, option=orjson.OPT_INDENT_2).decode()
 
 # Create sample data if none exists
 async def initialize_sample_data():
     """Initialize with sample S&P 500 companies if no data exists"""
     ensure_directories()
     
-    if not list(COMPANIES_DIR.glob("*.json")):
+    if not _company_files():
         sample_companies = [
             {
                 "symbol": "AAPL",
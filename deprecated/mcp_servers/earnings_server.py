@@ -3,24 +3,260 @@
 MCP Server for Earnings Analysis
 Handles earnings calendar, results, sentiment analysis, and historical patterns
 """
-import json
+import asyncio
+import heapq
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+import numpy as np
+import orjson
 from fastmcp import FastMCP
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    # numba is optional; without it the kernels run as plain Python
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+try:
+    import ijson
+    HISTORY_DECODE_ERRORS = (orjson.JSONDecodeError, ijson.JSONError)
+    HAS_IJSON = True
+except ImportError:
+    # ijson is optional; without it large history files are parsed whole
+    HISTORY_DECODE_ERRORS = (orjson.JSONDecodeError,)
+    HAS_IJSON = False
+
 # Initialize MCP server
 mcp = FastMCP("Earnings Analysis Server")
 
 # Base paths for data storage
 ASSETS_DIR = Path(__file__).parent.parent / "assets"
 EARNINGS_DIR = ASSETS_DIR / "earnings_data"
+INDEX_FILE = EARNINGS_DIR / "_index.json"
+
+# Parsed *_earnings.json files keyed by path, with the mtime they were read at;
+# seeded from INDEX_FILE on first use so unchanged files are never re-parsed
+_earnings_cache: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+_index_loaded = False
+
+# Tools touch the cache from worker threads; this guards it and the indexes below
+_cache_lock = threading.Lock()
+
+# Cached earnings as (earnings_date, record) sorted by date, plus the bare dates
+# for bisecting; _by_date is None until rebuilt after the cache changes
+_by_date: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+_dates: List[str] = []
+
+# Lower-cased surprise category -> (dates, records) in the same order as _by_date;
+# None until rebuilt from _by_date after it changes
+_by_category: Optional[Dict[str, Tuple[List[str], List[Tuple[str, Dict[str, Any]]]]]] = None
+
+# History files at least this large are streamed for their last quarters
+# instead of being parsed whole (needs ijson)
+HISTORY_STREAM_THRESHOLD = 64 * 1024
+
+# Earnings files are only read back by this server, so they are written compactly;
+# use orjson.OPT_INDENT_2 here for files meant to be read by hand
+EARNINGS_JSON_OPTION = 0
+
+# EPS surprise buckets: up to -5, (-5, 0], (0, 5], above 5
+SURPRISE_BINS = (-5.0, 0.0, 5.0)
+SURPRISE_CATEGORIES = ("Miss", "Meet/Minor Miss", "Beat", "Strong Beat")
+
+# Worker threads for reading many earnings files at once
+_io_pool = ThreadPoolExecutor(max_workers=16)
+
+# YYYY-MM-DD strings by offset from today; the date is re-checked at most once a minute
+DATE_CHECK_INTERVAL = 60.0
+_date_strings: Dict[int, str] = {}
+_date_checked_at = float('-inf')
+_date_today: Optional[date] = None
 
 def ensure_directories():
     """Ensure required directories exist"""
     EARNINGS_DIR.mkdir(parents=True, exist_ok=True)
 
+def _relative_date(days: int) -> str:
+    """Today's date shifted by a number of days, as YYYY-MM-DD"""
+    global _date_checked_at, _date_today
+    
+    now = time.monotonic()
+    if now - _date_checked_at >= DATE_CHECK_INTERVAL:
+        today = date.today()
+        if today != _date_today:
+            _date_strings.clear()
+            _date_today = today
+        _date_checked_at = now
+    
+    date_string = _date_strings.get(days)
+    if date_string is None:
+        date_string = _date_strings[days] = (_date_today + timedelta(days=days)).isoformat()
+    return date_string
+
+def _read_earnings(path: str) -> Optional[Dict[str, Any]]:
+    """Parse one earnings file, or return None if it is missing or invalid"""
+    try:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (orjson.JSONDecodeError, FileNotFoundError):
+        return None
+
+@lru_cache(maxsize=1024)
+def _load_history(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a history file; keyed on mtime so edits to the file are picked up"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+@lru_cache(maxsize=1024)
+def _load_history_tail(path: str, mtime_ns: int, quarters_back: int) -> Tuple[tuple, int]:
+    """Stream the last quarters_back quarters of a large history file, plus the total count"""
+    recent_quarters = deque(maxlen=quarters_back)
+    total_quarters = 0
+    with open(path, 'rb') as f:
+        for quarter in ijson.items(f, 'quarterly_earnings.item', use_float=True):
+            recent_quarters.append(quarter)
+            total_quarters += 1
+    return tuple(recent_quarters), total_quarters
+
+def _load_index():
+    """Seed the cache with the parsed files saved by _write_index"""
+    try:
+        index = orjson.loads(INDEX_FILE.read_bytes())
+        for name, (mtime_ns, earnings_data) in index.items():
+            _earnings_cache[os.path.join(EARNINGS_DIR, name)] = (mtime_ns, earnings_data)
+    except (orjson.JSONDecodeError, FileNotFoundError, AttributeError, TypeError, ValueError):
+        _earnings_cache.clear()
+
+def _write_index():
+    """Atomically persist the parsed files next to the earnings files"""
+    index = {os.path.basename(path): cached for path, cached in _earnings_cache.items()}
+    tmp_file = INDEX_FILE.with_suffix(".tmp")
+    tmp_file.write_bytes(orjson.dumps(index))
+    os.replace(tmp_file, INDEX_FILE)
+
+def _refresh_earnings():
+    """Re-read earnings files that changed since they were cached and re-sort by date"""
+    global _by_date, _dates, _by_category, _index_loaded
+    
+    if not _index_loaded:
+        _load_index()
+        _index_loaded = True
+    
+    seen = set()
+    changed = []
+    with os.scandir(EARNINGS_DIR) as entries:
+        for entry in entries:
+            if not entry.name.endswith("_earnings.json"):
+                continue
+            seen.add(entry.path)
+            
+            mtime_ns = entry.stat().st_mtime_ns
+            cached = _earnings_cache.get(entry.path)
+            if cached is None or cached[0] != mtime_ns:
+                changed.append((entry.path, mtime_ns))
+    
+    # Read all changed files in parallel rather than one after another
+    if changed:
+        paths = [path for path, _ in changed]
+        for (path, mtime_ns), earnings_data in zip(changed, _io_pool.map(_read_earnings, paths)):
+            _earnings_cache[path] = (mtime_ns, earnings_data)
+        _by_date = None
+    
+    removed = _earnings_cache.keys() - seen
+    for path in removed:
+        del _earnings_cache[path]
+        _by_date = None
+    
+    # Files saved through this server are picked up here on the next restart
+    if changed or removed:
+        _write_index()
+    
+    if _by_date is None:
+        _by_date = sorted(
+            (
+                (earnings_date, earnings_data)
+                for _, earnings_data in _earnings_cache.values()
+                if (earnings_date := _indexed_date(earnings_data))
+            ),
+            key=lambda item: item[0]
+        )
+        _dates = [earnings_date for earnings_date, _ in _by_date]
+        _by_category = None
+
+def _category_index() -> Dict[str, Tuple[List[str], List[Tuple[str, Dict[str, Any]]]]]:
+    """Group the date-sorted earnings by lower-cased surprise category"""
+    global _by_category
+    
+    if _by_category is None:
+        _by_category = {}
+        for earnings_date, earnings_data in _by_date:
+            surprise_category = earnings_data.get('surprise_category', '')
+            if not isinstance(surprise_category, str):
+                continue
+            dates, records = _by_category.setdefault(surprise_category.lower(), ([], []))
+            dates.append(earnings_date)
+            records.append((earnings_date, earnings_data))
+    
+    return _by_category
+
+def _indexed_date(earnings_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Earnings date a cached record is sorted under, or None if it has none"""
+    if isinstance(earnings_data, dict):
+        earnings_date = earnings_data.get('earnings_date')
+        if isinstance(earnings_date, str) and earnings_date:
+            return earnings_date
+    return None
+
+def _cache_earnings(path: str, mtime_ns: int, earnings_data: Dict[str, Any]):
+    """Cache a freshly written earnings record, keeping the date index sorted"""
+    global _by_category
+    
+    cached = _earnings_cache.get(path)
+    _earnings_cache[path] = (mtime_ns, earnings_data)
+    _by_category = None
+    
+    if _by_date is None:
+        return
+    
+    # Drop the record this file held before
+    old_date = _indexed_date(cached[1]) if cached is not None else None
+    if old_date is not None:
+        i = bisect_left(_dates, old_date)
+        while _by_date[i][1] is not cached[1]:
+            i += 1
+        del _by_date[i]
+        del _dates[i]
+    
+    new_date = _indexed_date(earnings_data)
+    if new_date is not None:
+        i = bisect_right(_dates, new_date)
+        _by_date.insert(i, (new_date, earnings_data))
+        _dates.insert(i, new_date)
+
+def _calendar_range(start_date: str, end_date: str, limit: int) -> List[Dict[str, Any]]:
+    """Up to limit cached earnings dated from start_date to end_date, earliest first"""
+    with _cache_lock:
+        _refresh_earnings()
+        
+        # Earnings are kept sorted by date, so the range is a slice
+        lo = bisect_left(_dates, start_date)
+        hi = min(bisect_right(_dates, end_date), lo + max(limit, 0))
+        return [earnings_data for _, earnings_data in _by_date[lo:hi]]
+
 @mcp.tool()
 async def get_earnings_calendar(
     start_date: Optional[str] = None,
@@ -41,29 +277,11 @@ async def get_earnings_calendar(
     ensure_directories()
     
     if not start_date:
-        start_date = datetime.now().strftime("%Y-%m-%d")
+        start_date = _relative_date(0)
     if not end_date:
-        end_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-    
-    earnings_calendar = []
+        end_date = _relative_date(30)
     
-    # Read earnings files
-    for earnings_file in EARNINGS_DIR.glob("*_earnings.json"):
-        try:
-            with open(earnings_file, 'r') as f:
-                earnings_data = json.load(f)
-                
-            # Filter by date range
-            earnings_date = earnings_data.get('earnings_date')
-            if earnings_date and start_date <= earnings_date <= end_date:
-                earnings_calendar.append(earnings_data)
-                
-        except (json.JSONDecodeError, FileNotFoundError):
-            continue
-    
-    # Sort by earnings date
-    earnings_calendar.sort(key=lambda x: x.get('earnings_date', ''))
-    earnings_calendar = earnings_calendar[:limit]
+    earnings_calendar = await asyncio.to_thread(_calendar_range, start_date, end_date, limit)
     
     return {
         "earnings_calendar": earnings_calendar,
@@ -87,30 +305,42 @@ async def get_company_earnings_history(
     Returns:
         Dictionary with historical earnings data
     """
+    return await asyncio.to_thread(_company_history, symbol, quarters_back)
+
+def _company_history(symbol: str, quarters_back: int) -> Dict[str, Any]:
+    """Synchronous body of get_company_earnings_history, for use inside other tools"""
     ensure_directories()
     
     symbol = symbol.upper()
     earnings_file = EARNINGS_DIR / f"{symbol}_history.json"
     
-    if not earnings_file.exists():
+    try:
+        file_stat = earnings_file.stat()
+    except FileNotFoundError:
         return {"error": f"No earnings history found for {symbol}"}
     
     try:
-        with open(earnings_file, 'r') as f:
-            history_data = json.load(f)
+        if HAS_IJSON and quarters_back > 0 and file_stat.st_size >= HISTORY_STREAM_THRESHOLD:
+            recent_quarters, total_quarters = _load_history_tail(
+                os.fspath(earnings_file), file_stat.st_mtime_ns, quarters_back
+            )
+            recent_quarters = list(recent_quarters)
+        else:
+            history_data = _load_history(os.fspath(earnings_file), file_stat.st_mtime_ns)
             
-        # Get recent quarters
-        quarters = history_data.get('quarterly_earnings', [])
-        recent_quarters = quarters[-quarters_back:] if quarters else []
+            # Get recent quarters
+            quarters = history_data.get('quarterly_earnings', [])
+            recent_quarters = quarters[-quarters_back:] if quarters else []
+            total_quarters = len(quarters)
         
         return {
             "symbol": symbol,
             "quarterly_earnings": recent_quarters,
             "quarters_returned": len(recent_quarters),
-            "total_quarters_available": len(quarters)
+            "total_quarters_available": total_quarters
         }
         
-    except json.JSONDecodeError:
+    except HISTORY_DECODE_ERRORS:
         return {"error": f"Invalid earnings history data for {symbol}"}
 
 @mcp.tool()
@@ -138,14 +368,7 @@ async def analyze_earnings_surprise(
     eps_surprise_percent = (eps_surprise / expected_eps) * 100 if expected_eps != 0 else 0
     
     # Determine surprise category
-    if eps_surprise_percent > 5:
-        surprise_category = "Strong Beat"
-    elif eps_surprise_percent > 0:
-        surprise_category = "Beat"
-    elif eps_surprise_percent > -5:
-        surprise_category = "Meet/Minor Miss"
-    else:
-        surprise_category = "Miss"
+    surprise_category = SURPRISE_CATEGORIES[bisect_left(SURPRISE_BINS, eps_surprise_percent)]
     
     analysis = {
         "symbol": symbol,
@@ -171,12 +394,13 @@ async def analyze_earnings_surprise(
         }
     
     # Historical context
-    history = await get_company_earnings_history(symbol, quarters_back=4)
+    history = _company_history(symbol, quarters_back=4)
     if "quarterly_earnings" in history:
-        recent_surprises = []
-        for quarter in history["quarterly_earnings"]:
-            if "eps_surprise_percent" in quarter:
-                recent_surprises.append(quarter["eps_surprise_percent"])
+        recent_surprises = [
+            quarter["eps_surprise_percent"]
+            for quarter in history["quarterly_earnings"]
+            if "eps_surprise_percent" in quarter
+        ]
         
         if recent_surprises:
             avg_surprise = sum(recent_surprises) / len(recent_surprises)
@@ -187,6 +411,109 @@ async def analyze_earnings_surprise(
     
     return analysis
 
+@njit(cache=True)
+def _classify_surprises(surprise_percent: np.ndarray) -> np.ndarray:
+    """Compiled SURPRISE_CATEGORIES index for each EPS surprise percentage"""
+    categories = np.empty(surprise_percent.shape[0], dtype=np.int64)
+    
+    for i in range(surprise_percent.shape[0]):
+        category = 0
+        for edge in SURPRISE_BINS:
+            if surprise_percent[i] > edge:
+                category += 1
+        categories[i] = category
+    
+    return categories
+
+@mcp.tool()
+async def analyze_earnings_surprise_batch(
+    earnings_results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Analyze EPS surprises for many earnings results at once
+    
+    Args:
+        earnings_results: List of dictionaries with symbol, actual_eps and expected_eps
+    
+    Returns:
+        Dictionary with per-company EPS surprise analysis
+    """
+    entries = [earnings for earnings in earnings_results if 'symbol' in earnings]
+    
+    # Collect inputs up front so the whole batch is scored in one pass
+    actual = np.zeros(len(entries))
+    expected = np.zeros(len(entries))
+    failed = {}
+    
+    for i, earnings in enumerate(entries):
+        try:
+            actual[i] = float(earnings['actual_eps'])
+            expected[i] = float(earnings['expected_eps'])
+        except (KeyError, TypeError, ValueError) as e:
+            failed[i] = e
+    
+    surprise = actual - expected
+    surprise_percent = np.divide(
+        surprise, expected, out=np.zeros_like(surprise), where=expected != 0
+    ) * 100
+    if HAS_NUMBA:
+        categories = _classify_surprises(surprise_percent)
+    else:
+        # The kernel's comparisons, vectorized; NaN compares false and lands in "Miss"
+        categories = (surprise_percent[:, None] > np.asarray(SURPRISE_BINS)).sum(axis=1)
+    
+    surprise = surprise.tolist()
+    rounded_percent = np.round(surprise_percent, 2).tolist()
+    categories = categories.tolist()
+    
+    analyses = []
+    for i, earnings in enumerate(entries):
+        if i in failed:
+            analyses.append({
+                "symbol": earnings.get('symbol'),
+                "error": f"Analysis failed: {str(failed[i])}"
+            })
+            continue
+        
+        analyses.append({
+            "symbol": earnings['symbol'],
+            "eps_analysis": {
+                "actual": earnings['actual_eps'],
+                "expected": earnings['expected_eps'],
+                "surprise": surprise[i],
+                "surprise_percent": rounded_percent[i],
+                "category": SURPRISE_CATEGORIES[categories[i]]
+            }
+        })
+    
+    return {
+        "analyses": analyses,
+        "total_processed": len(analyses)
+    }
+
+def _earnings_record(earnings_data: Dict[str, Any], recorded_at: str) -> Dict[str, Any]:
+    """Copy of earnings data as saved: timestamped, with an upper-case symbol"""
+    return {**earnings_data, 'recorded_at': recorded_at, 'symbol': earnings_data['symbol'].upper()}
+
+def _write_earnings(earnings_file: Path, data: bytes):
+    """Atomically replace an earnings file so readers never see a partial write"""
+    tmp_file = earnings_file.with_suffix(".tmp")
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_file, earnings_file)
+
+def _save_earnings(earnings_file: Path, record: Dict[str, Any]):
+    """Write an earnings record and cache it"""
+    data = orjson.dumps(record, option=EARNINGS_JSON_OPTION)
+    with _cache_lock:
+        _write_earnings(earnings_file, data)
+        _cache_earnings(os.fspath(earnings_file), earnings_file.stat().st_mtime_ns, record)
+
 @mcp.tool()
 async def save_earnings_result(earnings_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -203,16 +530,12 @@ async def save_earnings_result(earnings_data: Dict[str, Any]) -> Dict[str, Any]:
     if 'symbol' not in earnings_data:
         return {"error": "Symbol is required"}
     
-    symbol = earnings_data['symbol'].upper()
+    record = _earnings_record(earnings_data, datetime.now().isoformat())
+    symbol = record['symbol']
     earnings_file = EARNINGS_DIR / f"{symbol}_earnings.json"
     
-    # Add timestamp
-    earnings_data['recorded_at'] = datetime.now().isoformat()
-    earnings_data['symbol'] = symbol
-    
     try:
-        with open(earnings_file, 'w') as f:
-            json.dump(earnings_data, f, indent=2)
+        await asyncio.to_thread(_save_earnings, earnings_file, record)
         
         return {
             "success": True,
@@ -263,6 +586,47 @@ async def get_earnings_sentiment_summary(
         }
     }
 
+@dataclass(slots=True)
+class PatternHit:
+    """An earnings result matched by find_similar_earnings_patterns"""
+    symbol: Optional[str]
+    earnings_date: str
+    surprise_category: str
+    eps_surprise_percent: Optional[float]
+    next_day_return: Optional[float]
+    week_return: Optional[float]
+
+def _similar_patterns(surprise_key: str, cutoff_date: str) -> Tuple[List[PatternHit], int]:
+    """Newest ten cached earnings from cutoff_date on whose category contains surprise_key, and the match count"""
+    with _cache_lock:
+        _refresh_earnings()
+        
+        # Only categories containing the surprise type can match; within each,
+        # earnings on or after the cutoff are a date-sorted tail
+        matches = []
+        total_found = 0
+        for surprise_category, (dates, records) in _category_index().items():
+            if surprise_key in surprise_category:
+                count = len(dates) - bisect_left(dates, cutoff_date)
+                total_found += count
+                matches.append(islice(reversed(records), count))
+        
+        # Newest first across categories (could be enhanced with more sophisticated matching)
+        newest = heapq.merge(*matches, key=lambda item: item[0], reverse=True)
+        similar_patterns = [
+            PatternHit(
+                earnings_data.get('symbol'),
+                earnings_date,
+                earnings_data.get('surprise_category'),
+                earnings_data.get('eps_surprise_percent'),
+                earnings_data.get('next_day_return'),
+                earnings_data.get('week_return')
+            )
+            for earnings_date, earnings_data in islice(newest, 10)
+        ]
+    
+    return similar_patterns, total_found
+
 @mcp.tool()
 async def find_similar_earnings_patterns(
     target_company: str,
@@ -282,67 +646,43 @@ async def find_similar_earnings_patterns(
     """
     ensure_directories()
     
-    similar_patterns = []
-    cutoff_date = (datetime.now() - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
-    
-    # Search through earnings files
-    for earnings_file in EARNINGS_DIR.glob("*_earnings.json"):
-        try:
-            with open(earnings_file, 'r') as f:
-                earnings_data = json.load(f)
-            
-            # Skip if too old
-            earnings_date = earnings_data.get('earnings_date', '')
-            if earnings_date < cutoff_date:
-                continue
-            
-            # Check surprise type match
-            surprise_category = earnings_data.get('surprise_category', '').lower()
-            if surprise_type.lower() in surprise_category:
-                similar_patterns.append({
-                    "symbol": earnings_data.get('symbol'),
-                    "earnings_date": earnings_date,
-                    "surprise_category": earnings_data.get('surprise_category'),
-                    "eps_surprise_percent": earnings_data.get('eps_surprise_percent'),
-                    "next_day_return": earnings_data.get('next_day_return'),
-                    "week_return": earnings_data.get('week_return')
-                })
-                
-        except (json.JSONDecodeError, FileNotFoundError):
-            continue
-    
-    # Sort by similarity score (could be enhanced with more sophisticated matching)
-    similar_patterns.sort(key=lambda x: x.get('earnings_date', ''), reverse=True)
+    cutoff_date = _relative_date(-lookback_days)
+    similar_patterns, total_found = await asyncio.to_thread(
+        _similar_patterns, surprise_type.lower(), cutoff_date
+    )
     
     return {
         "target_company": target_company,
         "surprise_type": surprise_type,
-        "similar_patterns": similar_patterns[:10],  # Top 10 matches
-        "total_found": len(similar_patterns)
+        "similar_patterns": similar_patterns,  # Top 10 matches
+        "total_found": total_found
     }
 
 @mcp.resource("earnings://calendar")
 async def earnings_calendar_resource() -> str:
     """Resource providing current earnings calendar"""
     calendar_data = await get_earnings_calendar()
-    return json.dumps(calendar_data, indent=2)
+    return orjson.dumps(calendar_data, option=orjson.OPT_INDENT_2).decode()
 
 @mcp.resource("earnings://recent")
 async def recent_earnings_resource() -> str:
     """Resource providing recent earnings results"""
     # Get earnings from last 7 days
-    end_date = datetime.now().strftime("%Y-%m-%d")
-    start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    end_date = _relative_date(0)
+    start_date = _relative_date(-7)
     
     recent_data = await get_earnings_calendar(start_date, end_date, limit=20)
-    return json.dumps(recent_data, indent=2)
+    return orjson.dumps(recent_data, option=orjson.OPT_INDENT_2).decode()
 
 # Initialize sample earnings data
 async def initialize_sample_data():
     """Initialize with sample earnings data if none exists"""
     ensure_directories()
     
-    if not list(EARNINGS_DIR.glob("*.json")):
+    with os.scandir(EARNINGS_DIR) as entries:
+        has_data = any(entry.name.endswith(".json") for entry in entries)
+    
+    if not has_data:
         sample_earnings = [
             {
                 "symbol": "AAPL",
@@ -366,12 +706,18 @@ async def initialize_sample_data():
             }
         ]
         
-        for earnings in sample_earnings:
-            await save_earnings_result(earnings)
+        # Write all sample files in parallel rather than one save at a time
+        recorded_at = datetime.now().isoformat()
+        records = [_earnings_record(earnings, recorded_at) for earnings in sample_earnings]
+        earnings_files = [EARNINGS_DIR / f"{record['symbol']}_earnings.json" for record in records]
+        payloads = [orjson.dumps(record, option=EARNINGS_JSON_OPTION) for record in records]
+        list(_io_pool.map(_write_earnings, earnings_files, payloads))
+        
+        with _cache_lock:
+            for earnings_file, record in zip(earnings_files, records):
+                _cache_earnings(os.fspath(earnings_file), earnings_file.stat().st_mtime_ns, record)
 
 if __name__ == "__main__":
-    import asyncio
-    
     # Initialize sample data
     asyncio.run(initialize_sample_data())
     
@@ -3,24 +3,250 @@
 MCP Server for Stock Prediction Engine
 Handles next-day performance predictions after earnings announcements
 """
-import json
 import os
+import random
+import sqlite3
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional, Any
-import random
+from typing import List, Dict, Optional, Any, Tuple
+import numpy as np
+import orjson
 from fastmcp import FastMCP
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    # numba is optional; without it the kernels run as plain Python
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 # Initialize MCP server
 mcp = FastMCP("Stock Prediction Server")
 
 # Base paths for data storage
 ASSETS_DIR = Path(__file__).parent.parent / "assets"
 PREDICTIONS_DIR = ASSETS_DIR / "predictions"
+PREDICTIONS_DB = PREDICTIONS_DIR / "predictions.db"
+LEGACY_PREDICTIONS_DIR = PREDICTIONS_DIR / "legacy"
+
+# Shared connection to the predictions store, opened on first use
+_db: Optional[sqlite3.Connection] = None
+
+# Rendered resource bodies keyed by URI, with the monotonic time they were built.
+# Cleared whenever a prediction is saved.
+RESOURCE_CACHE_TTL = 30.0
+_resource_cache: Dict[str, Tuple[float, str]] = {}
+
+# Prediction model tables (in production, this would use ML).
+# EPS surprise buckets: below -10, [-10, -5), [-5, 0], (0, 5], (5, 10], above 10
+EPS_NEG_BINS = (-10.0, -5.0)
+EPS_POS_BINS = (0.0, 5.0, 10.0)
+EPS_MOVE = (-4.0, -2.5, -0.5, 0.8, 2.0, 3.5)
+EPS_CONF = (0.15, 0.1, 0.05, 0.1, 0.15, 0.2)
+
+# Revenue surprise buckets: below -5, [-5, 5], above 5
+REV_MOVE = (-1.5, 0.0, 1.0)
+REV_CONF = (0.1, 0.0, 0.1)
+
+# Confidence per (EPS bucket, revenue bucket), capped at 95% and floored at 30%
+CONFIDENCE = tuple(
+    tuple(round(min(max(0.5 + eps_conf + rev_conf, 0.3), 0.95), 3) for rev_conf in REV_CONF)
+    for eps_conf in EPS_CONF
+)
+
+TREND_MULTIPLIERS = {"bullish": 1.2, "bearish": 0.8}
+
+# Noise sources for single and batch predictions
+_noise = random.Random().uniform
+_rng = np.random.default_rng()
+
+# Predicted return buckets: up to -2, (-2, -0.5], (-0.5, 0.5], (0.5, 2], above 2
+DIRECTION_BINS = (-2.0, -0.5, 0.5, 2.0)
+DIRECTION_LABELS = (
+    ("Strong Negative", "High"),
+    ("Negative", "Medium"),
+    ("Neutral", "Low"),
+    ("Positive", "Medium"),
+    ("Strong Positive", "High")
+)
 
 def ensure_directories():
-    """Ensure required directories exist"""
-    PREDICTIONS_DIR.mkdir(parents=True, exist_ok=True)
+    """Ensure required directories and the predictions database exist"""
+    global _db
+    if _db is None:
+        PREDICTIONS_DIR.mkdir(parents=True, exist_ok=True)
+        _db = _open_database()
+
+def _open_database() -> sqlite3.Connection:
+    """Open the predictions database, creating the schema on first use"""
+    conn = sqlite3.connect(PREDICTIONS_DB, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            prediction_date TEXT NOT NULL,
+            earnings_date TEXT,
+            predicted_return REAL,
+            confidence REAL,
+            direction TEXT,
+            magnitude TEXT,
+            payload BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sym_date ON predictions(symbol, prediction_date);
+        CREATE INDEX IF NOT EXISTS idx_conf ON predictions(confidence DESC, prediction_date DESC);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """)
+    
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_import_done'").fetchone() is None:
+        _import_legacy_predictions(conn)
+    
+    return conn
+
+def _prediction_row(prediction_data: Dict[str, Any]) -> tuple:
+    """Build the predictions table row for a prediction dictionary"""
+    return (
+        prediction_data['symbol'].upper(),
+        prediction_data.get('prediction_date') or datetime.now().isoformat(),
+        prediction_data.get('earnings_date'),
+        prediction_data.get('predicted_return_percent'),
+        prediction_data.get('confidence_score', 0),
+        prediction_data.get('direction'),
+        prediction_data.get('magnitude'),
+        orjson.dumps(prediction_data, option=orjson.OPT_SERIALIZE_NUMPY)
+    )
+
+_INSERT_PREDICTION = """
+    INSERT INTO predictions (
+        symbol, prediction_date, earnings_date, predicted_return,
+        confidence, direction, magnitude, payload
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _write_prediction(prediction_data: Dict[str, Any]) -> int:
+    """Insert one prediction and return its row id"""
+    with _db:
+        prediction_id = _db.execute(_INSERT_PREDICTION, _prediction_row(prediction_data)).lastrowid
+    _resource_cache.clear()
+    return prediction_id
+
+def _legacy_predictions(name: str, content: bytes) -> List[Dict[str, Any]]:
+    """
+    Parse a legacy prediction file: a single SYMBOL_YYYYMMDD_HHMMSS_prediction.json,
+    or a SYMBOL.ndjson archive written by earlier versions. Lines of an archive
+    that are not prediction objects are skipped; a bad single file raises.
+    """
+    if name.endswith(".ndjson"):
+        predictions = []
+        for line in content.splitlines():
+            try:
+                prediction_data = orjson.loads(line)
+            except ValueError:
+                continue
+            if isinstance(prediction_data, dict):
+                predictions.append(prediction_data)
+        return predictions
+    
+    prediction_data = orjson.loads(content)
+    
+    # Older files may lack fields that are encoded in the filename
+    symbol, date_str, time_str = name.split('_')[:3]
+    prediction_data.setdefault('symbol', symbol)
+    if not prediction_data.get('prediction_date'):
+        if len(date_str) != 8 or len(time_str) != 6 or not (date_str + time_str).isdigit():
+            raise ValueError(f"no prediction date in {name}")
+        prediction_data['prediction_date'] = (
+            f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+            f"T{time_str[:2]}:{time_str[2:4]}:{time_str[4:]}"
+        )
+    return [prediction_data]
+
+def _import_legacy_predictions(conn: sqlite3.Connection):
+    """
+    Load predictions saved as files by earlier versions into the database
+    
+    Imported files are moved into LEGACY_PREDICTIONS_DIR, which is read again
+    along with the predictions directory whenever the database is recreated.
+    Files that cannot be parsed or stored are skipped and left in place.
+    Completion is recorded in the meta table in the same transaction as the
+    rows, so an interrupted import is retried on the next start.
+    """
+    LEGACY_PREDICTIONS_DIR.mkdir(exist_ok=True)
+    legacy_files = []
+    for directory in (PREDICTIONS_DIR, LEGACY_PREDICTIONS_DIR):
+        with os.scandir(directory) as entries:
+            legacy_files.extend(
+                Path(entry.path) for entry in entries
+                if entry.name.endswith(("_prediction.json", ".ndjson")) and entry.is_file()
+            )
+    
+    def read_file(legacy_file: Path) -> Optional[bytes]:
+        try:
+            return legacy_file.read_bytes()
+        except FileNotFoundError:
+            return None
+    
+    # Overlap the file reads; parsing stays on this thread
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        contents = list(pool.map(read_file, legacy_files))
+    
+    imported_files = []
+    with conn:
+        for legacy_file, content in zip(legacy_files, contents):
+            if content is None:
+                continue
+            
+            try:
+                predictions = _legacy_predictions(legacy_file.name, content)
+            except (ValueError, AttributeError, TypeError, KeyError):
+                # Not a prediction object, or fields of the wrong type
+                continue
+            
+            stored = 0
+            for prediction_data in predictions:
+                try:
+                    conn.execute(_INSERT_PREDICTION, _prediction_row(prediction_data))
+                    stored += 1
+                except (AttributeError, TypeError, KeyError, sqlite3.InterfaceError, sqlite3.ProgrammingError):
+                    # Fields of the wrong type, or a value SQLite cannot store
+                    continue
+            
+            # Archives keep every line when moved, so they move even if some were skipped
+            if legacy_file.parent == PREDICTIONS_DIR and (stored or legacy_file.suffix == ".ndjson"):
+                imported_files.append(legacy_file)
+        
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_import_done', ?)",
+                     (datetime.now().isoformat(),))
+    
+    for legacy_file in imported_files:
+        destination = LEGACY_PREDICTIONS_DIR / legacy_file.name
+        if not destination.exists():
+            os.replace(legacy_file, destination)
+        elif legacy_file.suffix == ".ndjson":
+            # An archive for the same symbol is already there; add these lines to it
+            with open(destination, 'ab') as f:
+                f.write(legacy_file.read_bytes())
+            legacy_file.unlink()
+        else:
+            # A single prediction holds one JSON document, so keep both files,
+            # numbering the new one; the symbol and timestamp still lead the name
+            prefix = legacy_file.name[:-len("_prediction.json")]
+            n = 1
+            while destination.exists():
+                destination = LEGACY_PREDICTIONS_DIR / f"{prefix}_{n}_prediction.json"
+                n += 1
+            os.replace(legacy_file, destination)
 
 @mcp.tool()
 async def predict_next_day_performance(
@@ -46,94 +272,147 @@ async def predict_next_day_performance(
     # Extract key features for prediction
     eps_surprise_percent = earnings_data.get('eps_surprise_percent', 0)
     revenue_surprise_percent = earnings_data.get('revenue_surprise_percent', 0)
-    surprise_category = earnings_data.get('surprise_category', 'Meet')
-    
-    # Simple prediction model (in production, this would use ML)
-    base_movement = 0
-    confidence = 0.5
-    
-    # EPS surprise impact
-    if eps_surprise_percent > 10:
-        base_movement += 3.5
-        confidence += 0.2
-    elif eps_surprise_percent > 5:
-        base_movement += 2.0
-        confidence += 0.15
-    elif eps_surprise_percent > 0:
-        base_movement += 0.8
-        confidence += 0.1
-    elif eps_surprise_percent < -10:
-        base_movement -= 4.0
-        confidence += 0.15
-    elif eps_surprise_percent < -5:
-        base_movement -= 2.5
-        confidence += 0.1
-    else:
-        base_movement -= 0.5
-        confidence += 0.05
-    
-    # Revenue surprise impact
-    if revenue_surprise_percent > 5:
-        base_movement += 1.0
-        confidence += 0.1
-    elif revenue_surprise_percent < -5:
-        base_movement -= 1.5
-        confidence += 0.1
-    
-    # Market context adjustments
-    if market_context:
-        market_trend = market_context.get('trend', 'neutral')
-        if market_trend == 'bullish':
-            base_movement *= 1.2
-        elif market_trend == 'bearish':
-            base_movement *= 0.8
     
+    predicted_return, confidence, label = _predict_one(
+        eps_surprise_percent,
+        revenue_surprise_percent,
+        _trend_multiplier(market_context)
+    )
+    
+    prediction = _build_prediction(
+        symbol, earnings_data, market_context, datetime.now().isoformat(),
+        predicted_return, confidence, label
+    )
+    
+    # Save prediction
+    _write_prediction(prediction)
+    
+    return prediction
+
+def _trend_multiplier(market_context: Optional[Dict[str, Any]]) -> float:
+    """Scale factor applied to the predicted move for the market trend"""
+    if not market_context:
+        return 1.0
+    return TREND_MULTIPLIERS.get(market_context.get('trend', 'neutral'), 1.0)
+
+def _predict_one(
+    eps_surprise: float,
+    revenue_surprise: float,
+    trend_multiplier: float
+) -> Tuple[float, float, int]:
+    """Score a single earnings result with table lookups (see _predict_batch)"""
+    eps_idx = bisect_right(EPS_NEG_BINS, eps_surprise) + bisect_left(EPS_POS_BINS, eps_surprise)
+    rev_idx = (revenue_surprise >= -5) + (revenue_surprise > 5)
+    
+    base_movement = (EPS_MOVE[eps_idx] + REV_MOVE[rev_idx]) * trend_multiplier
+    confidence = CONFIDENCE[eps_idx][rev_idx]
+    
+    # Add some randomness for realism
+    predicted_return = base_movement + _noise(-0.5, 0.5)
+    
+    return predicted_return, confidence, bisect_left(DIRECTION_BINS, predicted_return)
+
+def _predict_batch(
+    eps_surprise: np.ndarray,
+    revenue_surprise: np.ndarray,
+    trend_multiplier: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score many earnings results at once
+    
+    Args:
+        eps_surprise: EPS surprise percentages
+        revenue_surprise: Revenue surprise percentages
+        trend_multiplier: Market trend scale factor for the predicted move
+    
+    Returns:
+        Predicted returns, confidence scores and DIRECTION_LABELS indices
+    """
     # Add some randomness for realism
-    noise = random.uniform(-0.5, 0.5)
+    noise = _rng.uniform(-0.5, 0.5, size=eps_surprise.shape[0])
+    
+    if HAS_NUMBA:
+        return _score_kernel(eps_surprise, revenue_surprise, trend_multiplier, noise)
+    
+    eps_idx = (np.searchsorted(EPS_NEG_BINS, eps_surprise, side='right') +
+               np.searchsorted(EPS_POS_BINS, eps_surprise, side='left'))
+    rev_idx = (revenue_surprise >= -5).astype(np.intp) + (revenue_surprise > 5)
+    
+    base_movement = (np.take(EPS_MOVE, eps_idx) + np.take(REV_MOVE, rev_idx)) * trend_multiplier
+    confidence = np.asarray(CONFIDENCE)[eps_idx, rev_idx]
+    
     predicted_return = base_movement + noise
     
-    # Confidence adjustments
-    confidence = min(confidence, 0.95)  # Cap at 95%
-    confidence = max(confidence, 0.3)   # Floor at 30%
-    
-    # Prediction categories
-    if predicted_return > 2:
-        direction = "Strong Positive"
-        magnitude = "High"
-    elif predicted_return > 0.5:
-        direction = "Positive"
-        magnitude = "Medium"
-    elif predicted_return > -0.5:
-        direction = "Neutral"
-        magnitude = "Low"
-    elif predicted_return > -2:
-        direction = "Negative"
-        magnitude = "Medium"
-    else:
-        direction = "Strong Negative"
-        magnitude = "High"
+    labels = np.searchsorted(DIRECTION_BINS, predicted_return, side='left')
     
-    prediction = {
+    return predicted_return, confidence, labels
+
+@njit(cache=True)
+def _score_kernel(
+    eps_surprise: np.ndarray,
+    revenue_surprise: np.ndarray,
+    trend_multiplier: float,
+    noise: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compiled equivalent of the NumPy scoring in _predict_batch"""
+    n = eps_surprise.shape[0]
+    predicted_return = np.empty(n)
+    confidence = np.empty(n)
+    labels = np.empty(n, dtype=np.int64)
+    
+    for i in range(n):
+        eps = eps_surprise[i]
+        rev = revenue_surprise[i]
+        
+        eps_idx = 0
+        for edge in EPS_NEG_BINS:
+            if eps >= edge:
+                eps_idx += 1
+        for edge in EPS_POS_BINS:
+            if eps > edge:
+                eps_idx += 1
+        rev_idx = int(rev >= -5) + int(rev > 5)
+        
+        predicted_return[i] = (EPS_MOVE[eps_idx] + REV_MOVE[rev_idx]) * trend_multiplier + noise[i]
+        confidence[i] = CONFIDENCE[eps_idx][rev_idx]
+        
+        label = 0
+        for edge in DIRECTION_BINS:
+            if predicted_return[i] > edge:
+                label += 1
+        labels[i] = label
+    
+    return predicted_return, confidence, labels
+
+def _build_prediction(
+    symbol: str,
+    earnings_data: Dict[str, Any],
+    market_context: Optional[Dict[str, Any]],
+    prediction_date: str,
+    predicted_return: float,
+    confidence: float,
+    label: int
+) -> Dict[str, Any]:
+    """Assemble the prediction dictionary for one scored earnings result"""
+    direction, magnitude = DIRECTION_LABELS[label]
+    get = earnings_data.get
+    
+    return {
         "symbol": symbol,
-        "prediction_date": datetime.now().isoformat(),
-        "earnings_date": earnings_data.get('earnings_date'),
-        "predicted_return_percent": round(predicted_return, 2),
-        "confidence_score": round(confidence, 3),
+        "prediction_date": prediction_date,
+        "earnings_date": get('earnings_date'),
+        "predicted_return_percent": predicted_return,
+        "confidence_score": confidence,
         "direction": direction,
         "magnitude": magnitude,
         "model_version": "1.0",
         "features_used": {
-            "eps_surprise_percent": eps_surprise_percent,
-            "revenue_surprise_percent": revenue_surprise_percent,
-            "surprise_category": surprise_category,
+            "eps_surprise_percent": get('eps_surprise_percent', 0),
+            "revenue_surprise_percent": get('revenue_surprise_percent', 0),
+            "surprise_category": get('surprise_category', 'Meet'),
             "market_context": market_context
         }
     }
-    
-    # Save prediction
-    await save_prediction(prediction)
-    
-    return prediction
 
 @mcp.tool()
 async def save_prediction(prediction_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -152,17 +431,14 @@ async def save_prediction(prediction_data: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "Symbol is required"}
     
     symbol = prediction_data['symbol'].upper()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    prediction_file = PREDICTIONS_DIR / f"{symbol}_{timestamp}_prediction.json"
     
     try:
-        with open(prediction_file, 'w') as f:
-            json.dump(prediction_data, f, indent=2)
+        prediction_id = _write_prediction(prediction_data)
         
         return {
             "success": True,
             "message": f"Prediction for {symbol} saved successfully",
-            "file": str(prediction_file)
+            "prediction_id": prediction_id
         }
     except Exception as e:
         return {"error": f"Failed to save prediction: {str(e)}"}
@@ -187,24 +463,12 @@ async def get_prediction_history(
     symbol = symbol.upper()
     cutoff_date = datetime.now() - timedelta(days=days_back)
     
-    predictions = []
-    
-    for prediction_file in PREDICTIONS_DIR.glob(f"{symbol}_*_prediction.json"):
-        try:
-            # Extract date from filename
-            date_str = prediction_file.stem.split('_')[1]
-            file_date = datetime.strptime(date_str, "%Y%m%d")
-            
-            if file_date >= cutoff_date:
-                with open(prediction_file, 'r') as f:
-                    prediction_data = json.load(f)
-                predictions.append(prediction_data)
-                
-        except (ValueError, json.JSONDecodeError, FileNotFoundError):
-            continue
-    
-    # Sort by prediction date
-    predictions.sort(key=lambda x: x.get('prediction_date', ''), reverse=True)
+    rows = _db.execute(
+        "SELECT payload FROM predictions WHERE symbol = ? AND prediction_date >= ? "
+        "ORDER BY prediction_date DESC",
+        (symbol, cutoff_date.isoformat())
+    )
+    predictions = [orjson.loads(payload) for (payload,) in rows]
     
     return {
         "symbol": symbol,
@@ -234,55 +498,62 @@ async def analyze_prediction_accuracy(
     if not predictions or not actual_results:
         return {"error": "Insufficient data for accuracy analysis"}
     
+    # Index actual results by date; the first result for a date wins
+    actuals_by_date = {}
+    for actual in actual_results:
+        actuals_by_date.setdefault(actual.get('date'), actual)
+    
     matches = []
     
     # Match predictions with actual results
     for prediction in predictions:
         pred_date = prediction.get('earnings_date')
-        if not pred_date:
+        if not pred_date or pred_date not in actuals_by_date:
             continue
-            
-        for actual in actual_results:
-            actual_date = actual.get('date')
-            if pred_date == actual_date:
-                predicted_return = prediction.get('predicted_return_percent', 0)
-                actual_return = actual.get('next_day_return', 0)
-                error = abs(predicted_return - actual_return)
-                
-                matches.append({
-                    "date": pred_date,
-                    "predicted": predicted_return,
-                    "actual": actual_return,
-                    "error": round(error, 2),
-                    "confidence": prediction.get('confidence_score', 0)
-                })
-                break
+        
+        predicted_return = prediction.get('predicted_return_percent', 0)
+        actual_return = actuals_by_date[pred_date].get('next_day_return', 0)
+        error = abs(predicted_return - actual_return)
+        
+        matches.append({
+            "date": pred_date,
+            "predicted": predicted_return,
+            "actual": actual_return,
+            "error": round(error, 2),
+            "confidence": prediction.get('confidence_score', 0)
+        })
     
     if not matches:
         return {"error": "No matching predictions and actual results found"}
     
     # Calculate accuracy metrics
-    total_error = sum(match['error'] for match in matches)
-    mean_absolute_error = total_error / len(matches)
-    
-    # Direction accuracy
-    correct_direction = 0
-    for match in matches:
-        pred_sign = 1 if match['predicted'] > 0 else -1
-        actual_sign = 1 if match['actual'] > 0 else -1
-        if pred_sign == actual_sign:
-            correct_direction += 1
-    
-    direction_accuracy = correct_direction / len(matches)
+    predicted = np.fromiter((match['predicted'] for match in matches), dtype=np.float64, count=len(matches))
+    actual = np.fromiter((match['actual'] for match in matches), dtype=np.float64, count=len(matches))
+    mean_absolute_error, direction_accuracy = _accuracy_metrics(predicted, actual)
     
     return {
         "symbol": symbol,
         "total_predictions_analyzed": len(matches),
-        "mean_absolute_error": round(mean_absolute_error, 2),
-        "direction_accuracy_percent": round(direction_accuracy * 100, 1),
+        "mean_absolute_error": round(float(mean_absolute_error), 2),
+        "direction_accuracy_percent": round(float(direction_accuracy) * 100, 1),
         "matches": matches[-10:]  # Last 10 matches for review
     }
 
+@njit(cache=True, fastmath=True)
+def _accuracy_metrics(predicted: np.ndarray, actual: np.ndarray) -> Tuple[float, float]:
+    """Mean absolute error and share of predictions with the right direction"""
+    n = predicted.shape[0]
+    total_error = 0.0
+    correct_direction = 0
+    
+    for i in range(n):
+        diff = predicted[i] - actual[i]
+        total_error += diff if diff >= 0 else -diff
+        if (predicted[i] > 0) == (actual[i] > 0):
+            correct_direction += 1
+    
+    return total_error / n, correct_direction / n
+
 @mcp.tool()
 async def get_batch_predictions(
     earnings_calendar: List[Dict[str, Any]],
@@ -298,29 +569,67 @@ async def get_batch_predictions(
     Returns:
         Dictionary with batch predictions
     """
-    batch_predictions = []
+    ensure_directories()
     
-    for earnings in earnings_calendar:
-        if 'symbol' in earnings:
-            try:
-                prediction = await predict_next_day_performance(
-                    earnings['symbol'],
-                    earnings,
-                    market_context
-                )
-                batch_predictions.append(prediction)
-            except Exception as e:
-                batch_predictions.append({
-                    "symbol": earnings.get('symbol'),
-                    "error": f"Prediction failed: {str(e)}"
-                })
+    entries = [earnings for earnings in earnings_calendar if 'symbol' in earnings]
     
-    return {
+    # Collect features up front so the whole calendar is scored in one pass
+    eps_surprise = np.zeros(len(entries))
+    revenue_surprise = np.zeros(len(entries))
+    failed = {}
+    
+    for i, earnings in enumerate(entries):
+        try:
+            eps_surprise[i] = float(earnings.get('eps_surprise_percent', 0))
+            revenue_surprise[i] = float(earnings.get('revenue_surprise_percent', 0))
+        except (TypeError, ValueError) as e:
+            failed[i] = e
+    
+    returns, confidences, labels = _predict_batch(
+        eps_surprise, revenue_surprise, _trend_multiplier(market_context)
+    )
+    
+    # Plain Python scalars and one timestamp for the whole batch keep the
+    # per-company loop below cheap
+    returns, confidences, labels = returns.tolist(), confidences.tolist(), labels.tolist()
+    generated_at = datetime.now().isoformat()
+    
+    batch_predictions = []
+    rows = []
+    
+    for i, earnings in enumerate(entries):
+        try:
+            if i in failed:
+                raise failed[i]
+            
+            prediction = _build_prediction(
+                earnings['symbol'].upper(), earnings, market_context, generated_at,
+                returns[i], confidences[i], labels[i]
+            )
+            rows.append(_prediction_row(prediction))
+            batch_predictions.append(prediction)
+        except Exception as e:
+            batch_predictions.append({
+                "symbol": earnings.get('symbol'),
+                "error": f"Prediction failed: {str(e)}"
+            })
+    
+    result = {
         "batch_predictions": batch_predictions,
         "total_processed": len(batch_predictions),
         "market_context": market_context,
-        "generated_at": datetime.now().isoformat()
+        "generated_at": generated_at
     }
+    
+    # Save the whole batch in one transaction
+    try:
+        with _db:
+            _db.executemany(_INSERT_PREDICTION, rows)
+        _resource_cache.clear()
+    except sqlite3.Error as e:
+        result["error"] = f"Failed to save predictions: {str(e)}"
+    
+    return result
 
 @mcp.tool()
 async def get_top_predictions(
@@ -339,44 +648,68 @@ async def get_top_predictions(
     """
     ensure_directories()
     
-    all_predictions = []
-    cutoff_date = datetime.now() - timedelta(days=7)  # Last week
+    cutoff = (datetime.now() - timedelta(days=7)).isoformat()  # Last week
     
-    for prediction_file in PREDICTIONS_DIR.glob("*_prediction.json"):
-        try:
-            # Extract date from filename
-            date_str = prediction_file.stem.split('_')[1]
-            file_date = datetime.strptime(date_str, "%Y%m%d")
-            
-            if file_date >= cutoff_date:
-                with open(prediction_file, 'r') as f:
-                    prediction_data = json.load(f)
-                    
-                confidence = prediction_data.get('confidence_score', 0)
-                if confidence >= confidence_threshold:
-                    all_predictions.append(prediction_data)
-                    
-        except (ValueError, json.JSONDecodeError, FileNotFoundError):
-            continue
+    rows = _db.execute(
+        "SELECT payload FROM predictions WHERE confidence >= ? AND prediction_date >= ? "
+        "ORDER BY confidence DESC, prediction_date DESC LIMIT ?",
+        (confidence_threshold, cutoff, limit)
+    )
+    top_predictions = [orjson.loads(payload) for (payload,) in rows]
     
-    # Sort by confidence score descending
-    all_predictions.sort(key=lambda x: x.get('confidence_score', 0), reverse=True)
+    (total_found,) = _db.execute(
+        "SELECT COUNT(*) FROM predictions WHERE confidence >= ? AND prediction_date >= ?",
+        (confidence_threshold, cutoff)
+    ).fetchone()
     
     return {
-        "top_predictions": all_predictions[:limit],
+        "top_predictions": top_predictions,
         "confidence_threshold": confidence_threshold,
-        "total_found": len(all_predictions)
+        "total_found": total_found
     }
 
+def _cached_resource(uri: str) -> Optional[str]:
+    """Return a resource body rendered within the last RESOURCE_CACHE_TTL seconds"""
+    cached = _resource_cache.get(uri)
+    if cached is not None and time.monotonic() - cached[0] < RESOURCE_CACHE_TTL:
+        return cached[1]
+    return None
+
+def _display_prediction(prediction: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a prediction with scores rounded for display"""
+    display = dict(prediction)
+    if isinstance(display.get('predicted_return_percent'), float):
+        display['predicted_return_percent'] = round(display['predicted_return_percent'], 2)
+    if isinstance(display.get('confidence_score'), float):
+        display['confidence_score'] = round(display['confidence_score'], 3)
+    return display
+
+def _store_resource(uri: str, body: str) -> str:
+    """Remember a rendered resource body and return it"""
+    _resource_cache[uri] = (time.monotonic(), body)
+    return body
+
 @mcp.resource("predictions://recent")
 async def recent_predictions_resource() -> str:
     """Resource providing recent high-confidence predictions"""
+    cached = _cached_resource("predictions://recent")
+    if cached is not None:
+        return cached
+    
     recent_data = await get_top_predictions(confidence_threshold=0.6, limit=20)
-    return json.dumps(recent_data, indent=2)
+    recent_data['top_predictions'] = [_display_prediction(p) for p in recent_data['top_predictions']]
+    return _store_resource(
+        "predictions://recent",
+        orjson.dumps(recent_data, option=orjson.OPT_INDENT_2).decode()
+    )
 
 @mcp.resource("predictions://summary")
 async def predictions_summary_resource() -> str:
     """Resource providing prediction summary statistics"""
+    cached = _cached_resource("predictions://summary")
+    if cached is not None:
+        return cached
+    
     # Get all recent predictions for summary
     all_recent = await get_top_predictions(confidence_threshold=0.0, limit=100)
     predictions = all_recent.get('top_predictions', [])
@@ -385,12 +718,13 @@ async def predictions_summary_resource() -> str:
         summary = {"message": "No recent predictions available"}
     else:
         # Calculate summary stats
-        avg_confidence = sum(p.get('confidence_score', 0) for p in predictions) / len(predictions)
-        direction_counts = {}
-        
-        for p in predictions:
-            direction = p.get('direction', 'Unknown')
-            direction_counts[direction] = direction_counts.get(direction, 0) + 1
+        confidences = np.fromiter(
+            (p.get('confidence_score', 0) for p in predictions),
+            dtype=np.float64,
+            count=len(predictions)
+        )
+        avg_confidence = float(confidences.mean())
+        direction_counts = dict(Counter(p.get('direction', 'Unknown') for p in predictions))
         
         summary = {
             "total_predictions": len(predictions),
@@ -399,7 +733,10 @@ async def predictions_summary_resource() -> str:
             "last_updated": datetime.now().isoformat()
         }
     
-    return json.dumps(summary, indent=2)
+    return _store_resource(
+        "predictions://summary",
+        orjson.dumps(summary, option=orjson.OPT_INDENT_2).decode()
+    )
 
 if __name__ == "__main__":
     # Run the MCP server
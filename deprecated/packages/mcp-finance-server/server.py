@@ -5,19 +5,43 @@ MCP Finance Server - Enhanced financial data tools for Calvin Stock Prediction T
 
 from fastmcp import FastMCP
 import yfinance as yf
+import numpy as np
 import json
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 mcp = FastMCP("Finance Server")
 
+# In-process cache so repeated lookups of the same symbol skip the network.
+# Quotes stay fresh for a minute; company profile data changes rarely.
+QUOTE_TTL = 60
+INFO_TTL = timedelta(hours=24).total_seconds()
+_CACHE_PRUNE_SIZE = 1024
+
+_cache: Dict[Tuple, Tuple[float, Any]] = {}
+
+def _cached(key: Tuple, ttl: float, fetch: Callable[[], Any]) -> Any:
+    """Return fetch()'s value for key, reusing it until ttl seconds have passed"""
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    
+    value = fetch()
+    if len(_cache) >= _CACHE_PRUNE_SIZE:
+        for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+            del _cache[stale]
+    _cache[key] = (now + ttl, value)
+    return value
+
 @mcp.tool()
 async def get_stock_price(symbol: str) -> Dict[str, Any]:
     """Get current stock price and key metrics for a symbol"""
     try:
         ticker = yf.Ticker(symbol)
-        info = ticker.info
-        hist = ticker.history(period="2d")
+        info = _cached(("quote_info", symbol.upper()), QUOTE_TTL, lambda: ticker.info)
+        hist = _cached(("history", symbol.upper(), "2d", "1d"), QUOTE_TTL, lambda: ticker.history(period="2d"))
         
         if hist.empty:
             return {"error": f"No data available for {symbol}"}
@@ -45,22 +69,30 @@ async def get_market_data(symbol: str, period: str = "1mo", interval: str = "1d"
     """Get historical market data with flexible periods and intervals"""
     try:
         ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period, interval=interval)
+        hist = _cached(
+            ("history", symbol.upper(), period, interval), QUOTE_TTL,
+            lambda: ticker.history(period=period, interval=interval)
+        )
         
         if hist.empty:
             return {"error": f"No historical data available for {symbol}"}
         
-        # Convert to records for JSON serialization
-        data = []
-        for date, row in hist.iterrows():
-            data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "open": round(float(row["Open"]), 2),
-                "high": round(float(row["High"]), 2),
-                "low": round(float(row["Low"]), 2),
-                "close": round(float(row["Close"]), 2),
-                "volume": int(row["Volume"])
-            })
+        # Round the whole OHLC block at once, then build records from plain arrays
+        prices = np.round(hist[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64), 2).tolist()
+        volumes = hist["Volume"].to_numpy(dtype=np.int64).tolist()
+        dates = hist.index.strftime("%Y-%m-%d").tolist()
+        
+        data = [
+            {
+                "date": date,
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume
+            }
+            for date, (open_, high, low, close), volume in zip(dates, prices, volumes)
+        ]
         
         return {
             "symbol": symbol.upper(),
@@ -77,7 +109,7 @@ async def get_company_info(symbol: str) -> Dict[str, Any]:
     """Get comprehensive company information"""
     try:
         ticker = yf.Ticker(symbol)
-        info = ticker.info
+        info = _cached(("info", symbol.upper()), INFO_TTL, lambda: ticker.info)
         
         return {
             "symbol": symbol.upper(),
@@ -110,7 +142,7 @@ async def get_earnings_calendar(symbol: str) -> Dict[str, Any]:
     """Get earnings calendar and estimates for a symbol"""
     try:
         ticker = yf.Ticker(symbol)
-        calendar = ticker.calendar
+        calendar = _cached(("calendar", symbol.upper()), QUOTE_TTL, lambda: ticker.calendar)
         
         result = {"symbol": symbol.upper()}
         
@@ -4,48 +4,194 @@ MCP Sentiment Analysis Server for financial text analysis
 """
 
 from fastmcp import FastMCP
-from textblob import TextBlob
+from textblob.en import sentiment as _pattern_sentiment
+import asyncio
+import heapq
 import json
 import re
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from operator import itemgetter
+import numpy as np
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
 
 mcp = FastMCP("Sentiment Analysis Server")
 
-# Financial keywords for enhanced analysis
-POSITIVE_FINANCIAL_KEYWORDS = [
+# Sentence boundaries: whitespace after terminal punctuation, before a capitalized
+# word, so "vs. $3.1 billion" stays in one sentence
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(]?[A-Z])")
+
+# Financial keywords for enhanced analysis. These and the earnings phrases are
+# tuples because the matchers below are compiled from them once, at import.
+POSITIVE_FINANCIAL_KEYWORDS = (
     "beat", "exceed", "growth", "profit", "revenue", "strong", "outperform",
     "bullish", "upgrade", "buy", "positive", "gains", "rally", "surge"
-]
+)
 
-NEGATIVE_FINANCIAL_KEYWORDS = [
+NEGATIVE_FINANCIAL_KEYWORDS = (
     "miss", "decline", "loss", "weak", "underperform", "bearish", "downgrade",
     "sell", "negative", "drop", "fall", "crash", "concern", "risk"
-]
+)
+
+# Earnings-specific phrases
+EARNINGS_POSITIVE_PHRASES = ("guidance raise", "beat expectations", "strong quarter",
+                             "margin expansion", "record revenue", "growth outlook")
+EARNINGS_NEGATIVE_PHRASES = ("guidance cut", "miss expectations", "weak quarter",
+                             "margin compression", "revenue decline", "uncertainty")
+
+# Polarity cut points and the label for each bucket between them; a polarity on a
+# cut point falls in the lower bucket
+SENTIMENT_THRESHOLDS = (-0.3, -0.1, 0.1, 0.3)
+SENTIMENT_LABELS = ("very negative", "negative", "neutral", "positive", "very positive")
+
+# Earnings sentiment by net phrase score, clamped to -2..2
+EARNINGS_SENTIMENT_LABELS = ("very bearish", "bearish", "neutral", "bullish", "very bullish")
+
+def _keyword_trie(keywords: Iterable[str]) -> str:
+    """Regex source matching any keyword, factored as a trie on shared prefixes so
+    each position is tested once per character instead of once per keyword.
+    Optional tails are greedy, so the longest keyword at a position wins."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # A keyword ends here
+    
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+    
+    return build(trie)
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """Compile keywords into one case-insensitive pattern that finds every occurrence
+    in a single scan.
+    
+    The lookahead lets overlapping keywords all match, so results are the same as
+    checking each keyword with `in` against the lowercased text. Each position
+    reports the longest keyword starting there, and positions whose character
+    starts no keyword are rejected by a single character-class test.
+    """
+    keywords = list(keywords)
+    first_chars = re.escape("".join(sorted({keyword[0] for keyword in keywords})))
+    return re.compile(f"(?=[{first_chars}])(?=({_keyword_trie(keywords)}))", re.IGNORECASE)
+
+_POSITIVE_RE = _keyword_pattern(POSITIVE_FINANCIAL_KEYWORDS)
+_NEGATIVE_RE = _keyword_pattern(NEGATIVE_FINANCIAL_KEYWORDS)
+
+# Keywords and earnings phrases together, scanned in one pass; a shorter phrase
+# starting where a longer one matched ("beat" in "beat expectations") is recovered
+# from the prefixes of the longer one
+_ALL_PHRASES = frozenset(POSITIVE_FINANCIAL_KEYWORDS + NEGATIVE_FINANCIAL_KEYWORDS
+                         + EARNINGS_POSITIVE_PHRASES + EARNINGS_NEGATIVE_PHRASES)
+_PHRASE_RE = _keyword_pattern(_ALL_PHRASES)
+_PHRASE_PREFIXES = {
+    phrase: [other for other in _ALL_PHRASES if phrase.startswith(other)]
+    for phrase in _ALL_PHRASES
+}
+
+def _find_phrases(text: str) -> FrozenSet[str]:
+    """Every financial keyword and earnings phrase occurring in text"""
+    found = set()
+    for match in set(_PHRASE_RE.findall(text)):
+        found.update(_PHRASE_PREFIXES.get(match.lower(), ()))
+    return frozenset(found)
+
+@dataclass(slots=True, frozen=True)
+class SentimentResult:
+    """Sentiment of one text, shared through the caches below. Tools turn it into a
+    dict only for their response; the quick path leaves the keyword matches empty."""
+    sentiment: str
+    polarity: float
+    subjectivity: float
+    confidence: float
+    positive_matches: Tuple[str, ...] = ()
+    negative_matches: Tuple[str, ...] = ()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sentiment": self.sentiment,
+            "polarity": _score(self.polarity),
+            "subjectivity": _score(self.subjectivity),
+            "confidence": _score(self.confidence),
+            "financial_keywords": {
+                "positive": list(self.positive_matches),
+                "negative": list(self.negative_matches)
+            }
+        }
+
+@lru_cache(maxsize=1024)
+def _quick_sentiment(text: str) -> SentimentResult:
+    """Sentiment label, polarity and confidence of text, without the keyword lists.
+    
+    The confidence boost only needs to know whether a keyword agreeing with the
+    polarity occurs, so the scan stops at the first hit and is skipped entirely
+    for neutral polarity.
+    """
+    polarity, subjectivity = _pattern_sentiment(text)
+    
+    financial_boost = 0
+    if (polarity > 0 and _POSITIVE_RE.search(text)) or (polarity < 0 and _NEGATIVE_RE.search(text)):
+        financial_boost = 0.2
+    
+    return SentimentResult(
+        sentiment=SENTIMENT_LABELS[bisect_left(SENTIMENT_THRESHOLDS, polarity)],
+        polarity=polarity,
+        subjectivity=subjectivity,
+        confidence=min(abs(polarity) + financial_boost, 1.0)
+    )
+
+def _analyze_all(analyze, texts: List[str]) -> List[SentimentResult]:
+    """Apply an analysis function to each text.
+    
+    Tools run this through asyncio.to_thread, so a whole batch is one worker-thread
+    hop and the event loop stays free while the CPU-bound scoring runs.
+    """
+    return [analyze(text) for text in texts]
+
+def _score(value: float) -> float:
+    """A score rounded to 3 places for display.
+    
+    Scores stay at full precision while they are computed and compared; tools
+    round them only as they build their response.
+    """
+    return round(value, 3)
+
+def _timestamped(result: SentimentResult, timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """An analysis response stamped with timestamp, or the current time"""
+    analysis = result.to_dict()
+    analysis["analysis_timestamp"] = timestamp or datetime.now().isoformat()
+    return analysis
 
 @mcp.tool()
 async def analyze_sentiment(text: str) -> Dict[str, Any]:
     """Analyze sentiment of text using TextBlob with financial context"""
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
+    return _timestamped(await asyncio.to_thread(_analyze_sentiment_sync, text))
+
+def _analyze_sentiment_sync(text: str) -> SentimentResult:
+    """Sentiment of text with financial keyword context"""
+    return _full_scan(text)[0]
+
+@lru_cache(maxsize=1024)
+def _full_scan(text: str) -> Tuple[SentimentResult, FrozenSet[str]]:
+    """Sentiment analysis of text and every keyword and earnings phrase in it, from
+    one analyzer call and one keyword scan"""
+    polarity, subjectivity = _pattern_sentiment(text)
     
     # Enhanced sentiment classification
-    if polarity > 0.3:
-        sentiment = "very positive"
-    elif polarity > 0.1:
-        sentiment = "positive"
-    elif polarity > -0.1:
-        sentiment = "neutral"
-    elif polarity > -0.3:
-        sentiment = "negative"
-    else:
-        sentiment = "very negative"
+    sentiment = SENTIMENT_LABELS[bisect_left(SENTIMENT_THRESHOLDS, polarity)]
     
     # Financial keyword analysis
-    text_lower = text.lower()
-    positive_matches = [kw for kw in POSITIVE_FINANCIAL_KEYWORDS if kw in text_lower]
-    negative_matches = [kw for kw in NEGATIVE_FINANCIAL_KEYWORDS if kw in text_lower]
+    found = _find_phrases(text)
+    positive_matches = tuple(kw for kw in POSITIVE_FINANCIAL_KEYWORDS if kw in found)
+    negative_matches = tuple(kw for kw in NEGATIVE_FINANCIAL_KEYWORDS if kw in found)
     
     # Adjust confidence based on financial keywords
     financial_boost = 0
@@ -56,17 +202,9 @@ async def analyze_sentiment(text: str) -> Dict[str, Any]:
     
     confidence = min(abs(polarity) + financial_boost, 1.0)
     
-    return {
-        "sentiment": sentiment,
-        "polarity": round(polarity, 3),
-        "subjectivity": round(subjectivity, 3),
-        "confidence": round(confidence, 3),
-        "financial_keywords": {
-            "positive": positive_matches,
-            "negative": negative_matches
-        },
-        "analysis_timestamp": datetime.now().isoformat()
-    }
+    result = SentimentResult(sentiment, polarity, subjectivity, confidence,
+                             positive_matches, negative_matches)
+    return result, found
 
 @mcp.tool()
 async def analyze_earnings_sentiment(
@@ -75,35 +213,21 @@ async def analyze_earnings_sentiment(
 ) -> Dict[str, Any]:
     """Specialized sentiment analysis for earnings-related text"""
     
-    # Base sentiment analysis
-    base_analysis = await analyze_sentiment(earnings_text)
-    
-    # Earnings-specific keywords
-    earnings_positive = ["guidance raise", "beat expectations", "strong quarter", 
-                        "margin expansion", "record revenue", "growth outlook"]
-    earnings_negative = ["guidance cut", "miss expectations", "weak quarter",
-                        "margin compression", "revenue decline", "uncertainty"]
-    
-    text_lower = earnings_text.lower()
+    # Base sentiment analysis, with the earnings phrases from the same scan
+    base_result, found = await asyncio.to_thread(_full_scan, earnings_text)
+    base_analysis = _timestamped(base_result)
     
     # Count earnings-specific mentions
-    positive_earnings = sum(1 for phrase in earnings_positive if phrase in text_lower)
-    negative_earnings = sum(1 for phrase in earnings_negative if phrase in text_lower)
+    positive_phrases = [phrase for phrase in EARNINGS_POSITIVE_PHRASES if phrase in found]
+    negative_phrases = [phrase for phrase in EARNINGS_NEGATIVE_PHRASES if phrase in found]
+    positive_earnings = len(positive_phrases)
+    negative_earnings = len(negative_phrases)
     
     # Calculate earnings-specific sentiment score
     earnings_score = positive_earnings - negative_earnings
     
     # Determine earnings sentiment category
-    if earnings_score > 1:
-        earnings_sentiment = "very bullish"
-    elif earnings_score > 0:
-        earnings_sentiment = "bullish"
-    elif earnings_score < -1:
-        earnings_sentiment = "very bearish"
-    elif earnings_score < 0:
-        earnings_sentiment = "bearish"
-    else:
-        earnings_sentiment = "neutral"
+    earnings_sentiment = EARNINGS_SENTIMENT_LABELS[max(-2, min(earnings_score, 2)) + 2]
     
     return {
         "general_sentiment": base_analysis,
@@ -113,8 +237,7 @@ async def analyze_earnings_sentiment(
         "earnings_indicators": {
             "positive_mentions": positive_earnings,
             "negative_mentions": negative_earnings,
-            "key_phrases_found": [phrase for phrase in earnings_positive + earnings_negative 
-                                 if phrase in text_lower]
+            "key_phrases_found": positive_phrases + negative_phrases
         }
     }
 
@@ -129,14 +252,14 @@ async def batch_sentiment_analysis(
         return {"error": "Labels list must match texts list length"}
     
     results = []
+    analyses = await asyncio.to_thread(_analyze_all, _analyze_sentiment_sync, texts)
+    analyzed_at = datetime.now().isoformat()  # One timestamp for the whole batch
     
-    for i, text in enumerate(texts):
-        analysis = await analyze_sentiment(text)
-        
+    for i, (text, analysis) in enumerate(zip(texts, analyses)):
         result = {
             "index": i,
             "text_preview": text[:100] + "..." if len(text) > 100 else text,
-            "analysis": analysis
+            "analysis": _timestamped(analysis, analyzed_at)
         }
         
         if labels:
@@ -145,19 +268,17 @@ async def batch_sentiment_analysis(
         results.append(result)
     
     # Calculate aggregate statistics
-    polarities = [r["analysis"]["polarity"] for r in results]
-    avg_polarity = sum(polarities) / len(polarities) if polarities else 0
+    polarities = np.fromiter((analysis.polarity for analysis in analyses),
+                             dtype=np.float64, count=len(analyses))
+    avg_polarity = float(polarities.mean()) if polarities.size else 0
     
-    sentiment_counts = {}
-    for result in results:
-        sentiment = result["analysis"]["sentiment"]
-        sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
+    sentiment_counts = dict(Counter(analysis.sentiment for analysis in analyses))
     
     return {
         "batch_results": results,
         "aggregate_stats": {
             "total_texts": len(texts),
-            "average_polarity": round(avg_polarity, 3),
+            "average_polarity": _score(avg_polarity),
             "sentiment_distribution": sentiment_counts
         },
         "processed_at": datetime.now().isoformat()
@@ -178,41 +299,45 @@ async def sentiment_trend_analysis(
         if not all(field in item for field in required_fields):
             return {"error": f"Each item must have fields: {required_fields}"}
     
-    # Sort by timestamp
-    sorted_data = sorted(time_series_texts, key=lambda x: x["timestamp"])
-    
-    trend_analysis = []
+    # Sort by timestamp; already-ordered input (the usual case) is a single
+    # linear pass for Timsort, so it needs no separate check
+    sorted_data = sorted(time_series_texts, key=itemgetter("timestamp"))
     
-    for item in sorted_data:
-        sentiment_result = await analyze_sentiment(item["text"])
-        
-        trend_analysis.append({
-            "timestamp": item["timestamp"],
-            "text_preview": item["text"][:50] + "..." if len(item["text"]) > 50 else item["text"],
-            "sentiment": sentiment_result["sentiment"],
-            "polarity": sentiment_result["polarity"],
-            "confidence": sentiment_result["confidence"]
-        })
+    sentiment_results = await asyncio.to_thread(
+        _analyze_all, _quick_sentiment, [item["text"] for item in sorted_data]
+    )
     
-    # Calculate trend metrics
-    polarities = [item["polarity"] for item in trend_analysis]
+    # Calculate trend metrics over one polarity array
+    polarities = np.fromiter((r.polarity for r in sentiment_results),
+                             dtype=np.float64, count=len(sentiment_results))
     
-    if len(polarities) > 1:
+    if polarities.size > 1:
         # Simple trend calculation
         trend_direction = "improving" if polarities[-1] > polarities[0] else "declining"
-        volatility = max(polarities) - min(polarities)
+        volatility = float(np.ptp(polarities))
     else:
         trend_direction = "insufficient_data"
         volatility = 0
     
+    trend_analysis = [
+        {
+            "timestamp": item["timestamp"],
+            "text_preview": item["text"][:50] + "..." if len(item["text"]) > 50 else item["text"],
+            "sentiment": sentiment_result.sentiment,
+            "polarity": _score(sentiment_result.polarity),
+            "confidence": _score(sentiment_result.confidence)
+        }
+        for item, sentiment_result in zip(sorted_data, sentiment_results)
+    ]
+    
     return {
         "trend_data": trend_analysis,
         "trend_metrics": {
             "overall_direction": trend_direction,
-            "volatility": round(volatility, 3),
-            "start_polarity": polarities[0] if polarities else 0,
-            "end_polarity": polarities[-1] if polarities else 0,
-            "average_polarity": round(sum(polarities) / len(polarities), 3) if polarities else 0
+            "volatility": _score(volatility),
+            "start_polarity": _score(float(polarities[0])) if polarities.size else 0,
+            "end_polarity": _score(float(polarities[-1])) if polarities.size else 0,
+            "average_polarity": _score(float(polarities.mean())) if polarities.size else 0
         }
     }
 
@@ -223,44 +348,58 @@ async def extract_key_sentiments(
 ) -> Dict[str, Any]:
     """Extract and analyze sentiment of key sentences from text"""
     
-    # Split into sentences
-    blob = TextBlob(text)
-    sentences = [str(sentence).strip() for sentence in blob.sentences 
-                if len(str(sentence).strip()) >= min_sentence_length]
+    # Split into sentences, stripping each once
+    sentences = [sentence for sentence in map(str.strip, _SENTENCE_SPLIT_RE.split(text))
+                 if len(sentence) >= min_sentence_length]
     
-    sentence_sentiments = []
+    sentiment_results = await asyncio.to_thread(_analyze_all, _quick_sentiment, sentences)
     
-    for sentence in sentences:
-        sentiment_result = await analyze_sentiment(sentence)
-        
-        sentence_sentiments.append({
+    # Response entries carry rounded scores, so selection and counting use the
+    # full-precision result kept alongside each one
+    sentence_sentiments = []
+    scored = []
+    for sentence, sentiment_result in zip(sentences, sentiment_results):
+        entry = {
             "sentence": sentence,
-            "sentiment": sentiment_result["sentiment"],
-            "polarity": sentiment_result["polarity"],
-            "confidence": sentiment_result["confidence"]
-        })
+            "sentiment": sentiment_result.sentiment,
+            "polarity": _score(sentiment_result.polarity),
+            "confidence": _score(sentiment_result.confidence)
+        }
+        sentence_sentiments.append(entry)
+        scored.append((sentiment_result.polarity, entry))
     
-    # Sort by absolute polarity (most extreme sentiments first)
-    sorted_sentiments = sorted(sentence_sentiments, 
-                              key=lambda x: abs(x["polarity"]), 
-                              reverse=True)
+    # Select only the top few by polarity (most extreme sentiments first) rather
+    # than sorting every sentence
+    most_extreme = [entry for _, entry in heapq.nlargest(5, scored, key=lambda x: abs(x[0]))]
     
     # Extract most positive and negative sentences
-    most_positive = [s for s in sorted_sentiments if s["polarity"] > 0][:3]
-    most_negative = [s for s in sorted_sentiments if s["polarity"] < 0][:3]
+    most_positive = [entry for _, entry in heapq.nlargest(3, (s for s in scored if s[0] > 0),
+                                                          key=itemgetter(0))]
+    most_negative = [entry for _, entry in heapq.nsmallest(3, (s for s in scored if s[0] < 0),
+                                                           key=itemgetter(0))]
+    
+    # Count sentence sentiments in one pass
+    positive_sentences = negative_sentences = neutral_sentences = 0
+    for polarity, _ in scored:
+        if polarity > 0:
+            positive_sentences += 1
+        elif polarity < 0:
+            negative_sentences += 1
+        if abs(polarity) <= 0.1:
+            neutral_sentences += 1
     
     return {
         "all_sentences": sentence_sentiments,
         "key_sentiments": {
             "most_positive": most_positive,
             "most_negative": most_negative,
-            "most_extreme": sorted_sentiments[:5]
+            "most_extreme": most_extreme
         },
         "summary": {
             "total_sentences": len(sentences),
-            "positive_sentences": len([s for s in sentence_sentiments if s["polarity"] > 0]),
-            "negative_sentences": len([s for s in sentence_sentiments if s["polarity"] < 0]),
-            "neutral_sentences": len([s for s in sentence_sentiments if abs(s["polarity"]) <= 0.1])
+            "positive_sentences": positive_sentences,
+            "negative_sentences": negative_sentences,
+            "neutral_sentences": neutral_sentences
         }
     }
 
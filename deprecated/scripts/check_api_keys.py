@@ -5,6 +5,7 @@ This script validates API keys and tests their functionality
 """
 
 import os
+import sys
 import asyncio
 import aiohttp
 import yfinance as yf
@@ -20,18 +21,38 @@ class Colors:
     ENDC = '\033[0m'
     BOLD = '\033[1m'
 
+# No colors when output is piped or captured (e.g. in CI)
+if not sys.stdout.isatty():
+    for name in ("GREEN", "RED", "YELLOW", "BLUE", "ENDC", "BOLD"):
+        setattr(Colors, name, "")
+
+STATUS_PREFIXES = {
+    status: f"{color}[{status}]{Colors.ENDC}"
+    for status, color in (
+        ("INFO", Colors.BLUE),
+        ("SUCCESS", Colors.GREEN),
+        ("ERROR", Colors.RED),
+        ("WARNING", Colors.YELLOW),
+    )
+}
+
+# Output lines, written in one go by flush_output()
+_output = []
+
+def emit(line=""):
+    _output.append(line)
+
+def flush_output():
+    if _output:
+        sys.stdout.write("\n".join(_output) + "\n")
+        sys.stdout.flush()
+        _output.clear()
+
 def print_status(message, status="INFO"):
-    color = Colors.BLUE
-    if status == "SUCCESS":
-        color = Colors.GREEN
-    elif status == "ERROR":
-        color = Colors.RED
-    elif status == "WARNING":
-        color = Colors.YELLOW
-    
-    print(f"{color}[{status}]{Colors.ENDC} {message}")
+    prefix = STATUS_PREFIXES.get(status) or f"{Colors.BLUE}[{status}]{Colors.ENDC}"
+    emit(f"{prefix} {message}")
 
-async def test_polygon_api(api_key: str) -> bool:
+async def test_polygon_api(api_key: str, session: aiohttp.ClientSession) -> bool:
     """Test Polygon.io API"""
     if not api_key or api_key == "your_polygon_api_key_here":
         print_status("Polygon API key not configured", "WARNING")
@@ -41,25 +62,24 @@ async def test_polygon_api(api_key: str) -> bool:
         url = f"https://api.polygon.io/v2/aggs/ticker/AAPL/range/1/day/2023-01-01/2023-01-02"
         params = {"apikey": api_key}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("status") == "OK":
-                        print_status("Polygon API: Valid key, API working", "SUCCESS")
-                        return True
-                elif response.status == 401:
-                    print_status("Polygon API: Invalid API key", "ERROR")
-                elif response.status == 429:
-                    print_status("Polygon API: Rate limit exceeded", "WARNING")
-                else:
-                    print_status(f"Polygon API: Unexpected status {response.status}", "WARNING")
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                if data.get("status") == "OK":
+                    print_status("Polygon API: Valid key, API working", "SUCCESS")
+                    return True
+            elif response.status == 401:
+                print_status("Polygon API: Invalid API key", "ERROR")
+            elif response.status == 429:
+                print_status("Polygon API: Rate limit exceeded", "WARNING")
+            else:
+                print_status(f"Polygon API: Unexpected status {response.status}", "WARNING")
     except Exception as e:
         print_status(f"Polygon API: Connection error - {e}", "ERROR")
     
     return False
 
-async def test_alpha_vantage_api(api_key: str) -> bool:
+async def test_alpha_vantage_api(api_key: str, session: aiohttp.ClientSession) -> bool:
     """Test Alpha Vantage API"""
     if not api_key or api_key == "your_alpha_vantage_api_key_here":
         print_status("Alpha Vantage API key not configured", "WARNING")
@@ -73,27 +93,26 @@ async def test_alpha_vantage_api(api_key: str) -> bool:
             "apikey": api_key
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if "Global Quote" in data:
-                        print_status("Alpha Vantage API: Valid key, API working", "SUCCESS")
-                        return True
-                    elif "Error Message" in data:
-                        print_status(f"Alpha Vantage API: {data['Error Message']}", "ERROR")
-                    elif "Note" in data:
-                        print_status("Alpha Vantage API: Rate limit exceeded", "WARNING")
-                    else:
-                        print_status("Alpha Vantage API: Unexpected response format", "WARNING")
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                if "Global Quote" in data:
+                    print_status("Alpha Vantage API: Valid key, API working", "SUCCESS")
+                    return True
+                elif "Error Message" in data:
+                    print_status(f"Alpha Vantage API: {data['Error Message']}", "ERROR")
+                elif "Note" in data:
+                    print_status("Alpha Vantage API: Rate limit exceeded", "WARNING")
                 else:
-                    print_status(f"Alpha Vantage API: HTTP status {response.status}", "ERROR")
+                    print_status("Alpha Vantage API: Unexpected response format", "WARNING")
+            else:
+                print_status(f"Alpha Vantage API: HTTP status {response.status}", "ERROR")
     except Exception as e:
         print_status(f"Alpha Vantage API: Connection error - {e}", "ERROR")
     
     return False
 
-async def test_tavily_api(api_key: str) -> bool:
+async def test_tavily_api(api_key: str, session: aiohttp.ClientSession) -> bool:
     """Test Tavily API"""
     if not api_key or api_key == "your_tavily_api_key_here":
         print_status("Tavily API key not configured", "WARNING")
@@ -108,25 +127,24 @@ async def test_tavily_api(api_key: str) -> bool:
             "max_results": 1
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if "results" in data:
-                        print_status("Tavily API: Valid key, API working", "SUCCESS")
-                        return True
-                elif response.status == 401:
-                    print_status("Tavily API: Invalid API key", "ERROR")
-                elif response.status == 429:
-                    print_status("Tavily API: Rate limit exceeded", "WARNING")
-                else:
-                    print_status(f"Tavily API: HTTP status {response.status}", "WARNING")
+        async with session.post(url, json=payload, headers=headers) as response:
+            if response.status == 200:
+                data = await response.json()
+                if "results" in data:
+                    print_status("Tavily API: Valid key, API working", "SUCCESS")
+                    return True
+            elif response.status == 401:
+                print_status("Tavily API: Invalid API key", "ERROR")
+            elif response.status == 429:
+                print_status("Tavily API: Rate limit exceeded", "WARNING")
+            else:
+                print_status(f"Tavily API: HTTP status {response.status}", "WARNING")
     except Exception as e:
         print_status(f"Tavily API: Connection error - {e}", "ERROR")
     
     return False
 
-async def test_fmp_api(api_key: str) -> bool:
+async def test_fmp_api(api_key: str, session: aiohttp.ClientSession) -> bool:
     """Test Financial Modeling Prep API"""
     if not api_key or api_key == "your_fmp_api_key_here":
         print_status("Financial Modeling Prep API key not configured", "WARNING")
@@ -136,21 +154,20 @@ async def test_fmp_api(api_key: str) -> bool:
         url = f"https://financialmodelingprep.com/api/v3/quote/AAPL"
         params = {"apikey": api_key}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if isinstance(data, list) and len(data) > 0 and "symbol" in data[0]:
-                        print_status("Financial Modeling Prep API: Valid key, API working", "SUCCESS")
-                        return True
-                    elif isinstance(data, dict) and "Error Message" in data:
-                        print_status(f"FMP API: {data['Error Message']}", "ERROR")
-                elif response.status == 401:
-                    print_status("Financial Modeling Prep API: Invalid API key", "ERROR")
-                elif response.status == 429:
-                    print_status("Financial Modeling Prep API: Rate limit exceeded", "WARNING")
-                else:
-                    print_status(f"Financial Modeling Prep API: HTTP status {response.status}", "WARNING")
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                if isinstance(data, list) and len(data) > 0 and "symbol" in data[0]:
+                    print_status("Financial Modeling Prep API: Valid key, API working", "SUCCESS")
+                    return True
+                elif isinstance(data, dict) and "Error Message" in data:
+                    print_status(f"FMP API: {data['Error Message']}", "ERROR")
+            elif response.status == 401:
+                print_status("Financial Modeling Prep API: Invalid API key", "ERROR")
+            elif response.status == 429:
+                print_status("Financial Modeling Prep API: Rate limit exceeded", "WARNING")
+            else:
+                print_status(f"Financial Modeling Prep API: HTTP status {response.status}", "WARNING")
     except Exception as e:
         print_status(f"Financial Modeling Prep API: Connection error - {e}", "ERROR")
     
@@ -171,9 +188,9 @@ def test_yfinance() -> bool:
 
 async def main():
     """Main function to test all APIs"""
-    print(f"{Colors.BOLD}🔑 Calvin Stock Prediction Tool - API Key Validation{Colors.ENDC}")
-    print("=" * 60)
-    print()
+    emit(f"{Colors.BOLD}🔑 Calvin Stock Prediction Tool - API Key Validation{Colors.ENDC}")
+    emit("=" * 60)
+    emit()
     
     # Get API keys from environment
     api_keys = {
@@ -184,47 +201,40 @@ async def main():
     }
     
     print_status("Testing API connections...", "INFO")
-    print()
-    
-    # Test each API
-    results = []
-    
-    # Test Polygon
-    polygon_result = await test_polygon_api(api_keys["POLYGON_API_KEY"])
-    results.append(("Polygon.io", polygon_result))
-    
-    # Test Alpha Vantage
-    av_result = await test_alpha_vantage_api(api_keys["ALPHA_VANTAGE_API_KEY"])
-    results.append(("Alpha Vantage", av_result))
+    emit()
     
-    # Test Tavily
-    tavily_result = await test_tavily_api(api_keys["TAVILY_API_KEY"])
-    results.append(("Tavily", tavily_result))
+    # Test every API concurrently; yfinance is synchronous, so it runs in a thread
+    api_names = ["Polygon.io", "Alpha Vantage", "Tavily", "Financial Modeling Prep", "yfinance"]
+    # One shared session, so connector, DNS cache and TLS setup happen once
+    connector = aiohttp.TCPConnector(limit=10, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        api_results = await asyncio.gather(
+            test_polygon_api(api_keys["POLYGON_API_KEY"], session),
+            test_alpha_vantage_api(api_keys["ALPHA_VANTAGE_API_KEY"], session),
+            test_tavily_api(api_keys["TAVILY_API_KEY"], session),
+            test_fmp_api(api_keys["FINANCIAL_MODELING_PREP_API_KEY"], session),
+            asyncio.to_thread(test_yfinance),
+            return_exceptions=True
+        )
+    results = [(api_name, result is True) for api_name, result in zip(api_names, api_results)]
     
-    # Test Financial Modeling Prep
-    fmp_result = await test_fmp_api(api_keys["FINANCIAL_MODELING_PREP_API_KEY"])
-    results.append(("Financial Modeling Prep", fmp_result))
-    
-    # Test yfinance
-    yf_result = test_yfinance()
-    results.append(("yfinance", yf_result))
-    
-    print()
-    print("=" * 60)
-    print(f"{Colors.BOLD}📊 API Test Results Summary{Colors.ENDC}")
-    print("=" * 60)
+    emit()
+    emit("=" * 60)
+    emit(f"{Colors.BOLD}📊 API Test Results Summary{Colors.ENDC}")
+    emit("=" * 60)
     
     working_apis = 0
     total_apis = len(results)
     
     for api_name, status in results:
         status_text = f"{Colors.GREEN}✅ Working{Colors.ENDC}" if status else f"{Colors.RED}❌ Not Working{Colors.ENDC}"
-        print(f"{api_name:25} {status_text}")
+        emit(f"{api_name:25} {status_text}")
         if status:
             working_apis += 1
     
-    print()
-    print(f"Working APIs: {working_apis}/{total_apis}")
+    emit()
+    emit(f"Working APIs: {working_apis}/{total_apis}")
     
     if working_apis == 0:
         print_status("No APIs are working. The system will have limited functionality.", "ERROR")
@@ -234,15 +244,18 @@ async def main():
     else:
         print_status("Good! Multiple APIs are working. The system should function well.", "SUCCESS")
     
-    print()
-    print(f"{Colors.BOLD}💡 Tips:{Colors.ENDC}")
-    print("- Get free API keys from the respective websites")
-    print("- yfinance works without API keys but may have rate limits")
-    print("- At least one working API is recommended for data collection")
-    print("- Multiple APIs provide redundancy and more data sources")
+    emit()
+    emit(f"{Colors.BOLD}💡 Tips:{Colors.ENDC}")
+    emit("- Get free API keys from the respective websites")
+    emit("- yfinance works without API keys but may have rate limits")
+    emit("- At least one working API is recommended for data collection")
+    emit("- Multiple APIs provide redundancy and more data sources")
     
     return working_apis > 0
 
 if __name__ == "__main__":
-    success = asyncio.run(main())
+    try:
+        success = asyncio.run(main())
+    finally:
+        flush_output()
     exit(0 if success else 1)
\ No newline at end of file
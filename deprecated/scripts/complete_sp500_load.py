@@ -4,43 +4,183 @@ Enhanced script to load complete S&P 500 company data with comprehensive enrichm
 """
 
 import asyncio
+import io
 import json
+import logging
 import os
 import yfinance as yf
+import numpy as np
+import orjson
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 from pathlib import Path
 import time
+from collections import Counter
 from typing import Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
+SP500_WIKI_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+
+# Wikipedia table column -> company field
+WIKI_COLUMNS = {
+    "Symbol": "symbol",
+    "Security": "name",
+    "GICS Sector": "sector",
+    "GICS Sub-Industry": "industry",
+    "Date added": "date_added",
+    "Headquarters Location": "headquarters",
+    "Founded": "founded",
+}
+
+# Fields filled in from a company's price history
+PRICE_FIELDS = (
+    "current_price", "year_high", "year_low",
+    "price_change_1d", "price_change_1w", "price_change_1m",
+)
+
+# Symbols per batched price-history download
+PRICE_BATCH_SIZE = 20
+
+# Companies enriched at the same time
+MAX_CONCURRENT_COMPANIES = 16
+
+# orjson options for saved files; default=str still covers anything else
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Errors from a yfinance field that is missing or shaped differently for a symbol;
+# anything else (including KeyboardInterrupt and cancellation) propagates
+_YF_TRANSIENT = (AttributeError, KeyError, ValueError, TypeError, requests.exceptions.RequestException)
+
+QUARTER_BY_MONTH = {month: f"Q{(month - 1) // 3 + 1}" for month in range(1, 13)}
+
+# With --resume, company files younger than this are reused instead of refetched
+RESUME_MAX_AGE = 24 * 60 * 60
+
+# Attempts per yfinance lookup, and the first retry delay in seconds (doubled per retry)
+YF_ATTEMPTS = 3
+YF_RETRY_DELAY = 0.5
+
+# Per-company yfinance lookups allowed per minute, averaged; bursts up to this are fine
+COMPANY_FETCHES_PER_MINUTE = 55
+
+
+def _with_retries(fetch):
+    """Call fetch(), retrying network and rate-limit failures with exponential backoff.
+    
+    Errors from data a symbol simply lacks are raised at once, as is the last failure.
+    """
+    for attempt in range(YF_ATTEMPTS):
+        try:
+            return fetch()
+        except (AttributeError, KeyError, IndexError, ValueError, TypeError):
+            raise
+        except Exception:
+            if attempt == YF_ATTEMPTS - 1:
+                raise
+            time.sleep(YF_RETRY_DELAY * 2 ** attempt)
+
+
+class AsyncRateLimiter:
+    """Token bucket allowing max_rate entries per time_period seconds on average"""
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.max_rate,
+                    self._tokens + (now - self._updated) * self.max_rate / self.time_period
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
 
 class SP500DataCollector:
-    def __init__(self):
+    def __init__(self, resume: bool = False):
+        self.resume = resume
         self.alpha_vantage_key = os.getenv("ALPHA_VANTAGE_API_KEY")
         self.tavily_key = os.getenv("TAVILY_API_KEY")
         self.polygon_key = os.getenv("POLYGON_API_KEY")
         self.assets_dir = Path("assets/sp500_companies")
         self.assets_dir.mkdir(exist_ok=True)
         
+        # Pooled session with retries for the Wikipedia request, which caches by
+        # conditional GET itself. yfinance manages its own curl_cffi session and
+        # rejects requests sessions
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503]),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiter = AsyncRateLimiter(COMPANY_FETCHES_PER_MINUTE)
+        self.run_timestamp = datetime.now().isoformat()
+        
     async def get_complete_sp500_list(self) -> List[Dict]:
         """Get complete S&P 500 companies list from Wikipedia"""
         try:
-            url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-            tables = pd.read_html(url)
+            # Conditional GET against the last parsed copy of the page
+            cache_file = self.assets_dir / "_wiki_cache.json"
+            cached = None
+            headers = {}
+            if cache_file.exists():
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            
+            # Fetch and parse in worker threads so the event loop is never blocked
+            response = await asyncio.to_thread(self.session.get, SP500_WIKI_URL, headers=headers, timeout=30)
+            if response.status_code == 304 and cached is not None:
+                companies = cached["companies"]
+                print(f"✅ Found {len(companies)} S&P 500 companies from Wikipedia (unchanged since last run)")
+                return companies
+            response.raise_for_status()
+            
+            tables = await asyncio.to_thread(pd.read_html, io.StringIO(response.text))
             sp500_table = tables[0]
             
-            companies = []
-            for _, row in sp500_table.iterrows():
-                companies.append({
-                    "symbol": row["Symbol"],
-                    "name": row["Security"],
-                    "sector": row["GICS Sector"],
-                    "industry": row["GICS Sub-Industry"],
-                    "date_added": str(row.get("Date added", "")),
-                    "headquarters": row.get("Headquarters Location", ""),
-                    "founded": row.get("Founded", ""),
-                })
+            # Rename and convert whole columns rather than building a Series per row;
+            # the last three columns are optional on the page
+            sp500_table = sp500_table.rename(columns=WIKI_COLUMNS)
+            for column in ("date_added", "headquarters", "founded"):
+                if column not in sp500_table:
+                    sp500_table[column] = ""
+            sp500_table["date_added"] = sp500_table["date_added"].map(str)
+            # Sectors and sub-industries repeat heavily; as categoricals each
+            # distinct name is one shared string in the records
+            for column in ("sector", "industry"):
+                sp500_table[column] = sp500_table[column].astype("category")
+            companies = sp500_table[list(WIKI_COLUMNS.values())].to_dict(orient="records")
+            
+            with open(cache_file, 'w') as f:
+                json.dump({
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "companies": companies,
+                }, f, default=str)
             
             print(f"✅ Found {len(companies)} S&P 500 companies from Wikipedia")
             return companies
@@ -49,52 +189,105 @@ class SP500DataCollector:
             print(f"❌ Error fetching S&P 500 list: {e}")
             return []
 
-    async def get_enhanced_company_info(self, symbol: str) -> Dict:
-        """Get comprehensive company information using yfinance"""
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Get stock price history for trends
-            hist = ticker.history(period="1y")
-            current_price = hist['Close'].iloc[-1] if not hist.empty else None
-            year_high = hist['High'].max() if not hist.empty else None
-            year_low = hist['Low'].min() if not hist.empty else None
+    def _price_fields(self, hist: pd.DataFrame) -> Dict:
+        """Current price, 52-week range and recent performance from a year of daily prices"""
+        price_fields = dict.fromkeys(PRICE_FIELDS)
+        if hist.empty:
+            return price_fields
+        
+        # Work on the raw columns; only a few scalars are needed from the frame
+        closes = hist['Close'].to_numpy()
+        price_fields["current_price"] = closes[-1]
+        price_fields["year_high"] = np.nanmax(hist['High'].to_numpy())
+        price_fields["year_low"] = np.nanmin(hist['Low'].to_numpy())
+        
+        # Calculate price performance over 1 day, 1 week and 1 month of trading days
+        for field, days in (("price_change_1d", 1), ("price_change_1w", 5), ("price_change_1m", 22)):
+            if len(closes) > days:
+                price_fields[field] = (closes[-1] - closes[-1 - days]) / closes[-1 - days] * 100
+        
+        return price_fields
+
+    def _fetch_batch(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Price fields for many symbols, downloading a year of history per batch of symbols"""
+        prices = {}
+        
+        for start in range(0, len(symbols), PRICE_BATCH_SIZE):
+            batch = symbols[start:start + PRICE_BATCH_SIZE]
+            try:
+                hist = yf.download(batch, period="1y", group_by="ticker", auto_adjust=True,
+                                   threads=True, progress=False)
+            except Exception as e:
+                print(f"⚠️  Error downloading prices for {', '.join(batch)}: {e}")
+                continue
             
-            # Calculate price performance
-            price_change_1d = None
-            price_change_1w = None
-            price_change_1m = None
+            for symbol in batch:
+                try:
+                    # Single-symbol downloads come back without the ticker column level
+                    symbol_hist = hist[symbol] if isinstance(hist.columns, pd.MultiIndex) else hist
+                    symbol_hist = symbol_hist.dropna(how="all")
+                    if not symbol_hist.empty:
+                        prices[symbol] = self._price_fields(symbol_hist)
+                except Exception:
+                    continue
+        
+        print(f"✅ Downloaded price history for {len(prices)}/{len(symbols)} companies")
+        return prices
+
+    def _fetch_symbol_bundle(self, symbol: str, need_history: bool = True) -> Dict:
+        """Fetch everything the extractors need for one company from a single Ticker"""
+        ticker = yf.Ticker(symbol)
+        bundle = {"history": None}
+        
+        for name in ("info", "quarterly_earnings", "calendar", "recommendations"):
+            try:
+                bundle[name] = _with_retries(lambda: getattr(ticker, name))
+            except Exception as e:
+                bundle[name] = None
+                if name == "info":
+                    print(f"⚠️  Error getting enhanced info for {symbol}: {e}")
+        
+        # Stock price history for trends, unless it came from a batch download
+        if need_history:
+            try:
+                bundle["history"] = _with_retries(lambda: ticker.history(period="1y"))
+            except Exception as e:
+                print(f"⚠️  Error getting enhanced info for {symbol}: {e}")
+        
+        return bundle
+
+    def _extract_company_info(self, symbol: str, info: Optional[Dict], hist: Optional[pd.DataFrame],
+                              price_fields: Optional[Dict] = None) -> Dict:
+        """Comprehensive company information from a yfinance info dict and price history"""
+        if info is None or (price_fields is None and hist is None):
+            return {}
+        
+        try:
+            if price_fields is None:
+                price_fields = self._price_fields(hist)
             
-            if len(hist) >= 1:
-                price_change_1d = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2] * 100) if len(hist) >= 2 else None
-            if len(hist) >= 5:
-                price_change_1w = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-6]) / hist['Close'].iloc[-6] * 100)
-            if len(hist) >= 22:
-                price_change_1m = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-23]) / hist['Close'].iloc[-23] * 100)
+            # Look up the fields that get transformed once each
+            market_cap = info.get("marketCap")
+            revenue = info.get("totalRevenue")
+            description = info.get("longBusinessSummary") or ""
             
             enhanced_info = {
                 # Financial metrics
-                "market_cap": info.get("marketCap", 0) / 1_000_000 if info.get("marketCap") else None,
+                "market_cap": market_cap / 1_000_000 if market_cap else None,
                 "pe_ratio": info.get("trailingPE"),
                 "forward_pe": info.get("forwardPE"),
                 "eps": info.get("trailingEps"),
-                "revenue": info.get("totalRevenue", 0) / 1_000_000 if info.get("totalRevenue") else None,
+                "revenue": revenue / 1_000_000 if revenue else None,
                 "profit_margin": info.get("profitMargins"),
                 "debt_to_equity": info.get("debtToEquity"),
                 "return_on_equity": info.get("returnOnEquity"),
                 "dividend_yield": info.get("dividendYield"),
                 
                 # Price information
-                "current_price": current_price,
-                "year_high": year_high,
-                "year_low": year_low,
-                "price_change_1d": price_change_1d,
-                "price_change_1w": price_change_1w,
-                "price_change_1m": price_change_1m,
+                **price_fields,
                 
                 # Company details
-                "description": info.get("longBusinessSummary", "")[:750] if info.get("longBusinessSummary") else "",
+                "description": description[:750],
                 "website": info.get("website"),
                 "employees": info.get("fullTimeEmployees"),
                 "exchange": info.get("exchange"),
@@ -112,31 +305,31 @@ class SP500DataCollector:
             print(f"⚠️  Error getting enhanced info for {symbol}: {e}")
             return {}
 
-    async def get_earnings_calendar_data(self, symbol: str) -> List[Dict]:
-        """Get comprehensive earnings data including upcoming and historical"""
+    def _extract_earnings(self, symbol: str, quarterly_earnings: Optional[pd.DataFrame],
+                          calendar: Optional[pd.DataFrame]) -> List[Dict]:
+        """Comprehensive earnings data including upcoming and historical"""
         try:
-            ticker = yf.Ticker(symbol)
             earnings_events = []
             
-            # Get quarterly earnings
+            # Quarterly earnings
             try:
-                quarterly_earnings = ticker.quarterly_earnings
                 if quarterly_earnings is not None and not quarterly_earnings.empty:
-                    for date, row in quarterly_earnings.head(12).iterrows():  # Last 12 quarters
+                    # Plain tuples instead of a Series per row; missing columns read as NaN
+                    rows = quarterly_earnings.head(12).reindex(columns=["Earnings", "Revenue"])  # Last 12 quarters
+                    for date, earnings, revenue in rows.itertuples(index=True, name=None):
                         earnings_events.append({
                             "type": "historical",
                             "earnings_date": date.isoformat() if pd.notna(date) else None,
-                            "quarter": f"Q{((date.month - 1) // 3) + 1}",
+                            "quarter": QUARTER_BY_MONTH.get(date.month),
                             "year": date.year,
-                            "actual_eps": float(row.get("Earnings", 0)) if pd.notna(row.get("Earnings")) else None,
-                            "actual_revenue": float(row.get("Revenue", 0)) / 1_000_000 if pd.notna(row.get("Revenue")) else None,
+                            "actual_eps": None if pd.isna(earnings) else float(earnings),
+                            "actual_revenue": None if pd.isna(revenue) else float(revenue) / 1_000_000,
                         })
-            except:
-                pass
+            except _YF_TRANSIENT as e:
+                logger.debug("yfinance quarterly earnings unavailable for %s: %s", symbol, e)
             
-            # Get earnings calendar (upcoming earnings)
+            # Earnings calendar (upcoming earnings)
             try:
-                calendar = ticker.calendar
                 if calendar is not None and not calendar.empty:
                     for _, row in calendar.iterrows():
                         earnings_events.append({
@@ -146,8 +339,8 @@ class SP500DataCollector:
                             "reported_eps": row.get("Reported EPS"),
                             "surprise": row.get("Surprise(%)"),
                         })
-            except:
-                pass
+            except _YF_TRANSIENT as e:
+                logger.debug("yfinance earnings calendar unavailable for %s: %s", symbol, e)
             
             return earnings_events
             
@@ -155,15 +348,14 @@ class SP500DataCollector:
             print(f"⚠️  Error getting earnings for {symbol}: {e}")
             return []
 
-    async def get_analyst_data(self, symbol: str) -> Dict:
-        """Get analyst recommendations and price targets"""
+    def _extract_analyst_data(self, symbol: str, info: Optional[Dict],
+                              recommendations: Optional[pd.DataFrame]) -> Dict:
+        """Analyst recommendations and price targets"""
         try:
-            ticker = yf.Ticker(symbol)
             analyst_data = {}
             
-            # Get recommendations
+            # Recommendations
             try:
-                recommendations = ticker.recommendations
                 if recommendations is not None and not recommendations.empty:
                     latest_rec = recommendations.iloc[-1] if not recommendations.empty else None
                     if latest_rec is not None:
@@ -175,20 +367,19 @@ class SP500DataCollector:
                             "strong_sell": int(latest_rec.get("strongSell", 0)),
                             "recommendation_date": latest_rec.name.isoformat() if pd.notna(latest_rec.name) else None,
                         })
-            except:
-                pass
+            except _YF_TRANSIENT as e:
+                logger.debug("yfinance recommendations unavailable for %s: %s", symbol, e)
             
-            # Get analyst price targets
+            # Analyst price targets
             try:
-                info = ticker.info
                 analyst_data.update({
                     "target_high": info.get("targetHighPrice"),
                     "target_low": info.get("targetLowPrice"),
                     "target_mean": info.get("targetMeanPrice"),
                     "target_median": info.get("targetMedianPrice"),
                 })
-            except:
-                pass
+            except _YF_TRANSIENT as e:
+                logger.debug("yfinance price targets unavailable for %s: %s", symbol, e)
             
             return analyst_data
             
@@ -196,12 +387,24 @@ class SP500DataCollector:
             print(f"⚠️  Error getting analyst data for {symbol}: {e}")
             return {}
 
+    def _write_json(self, filepath: Path, data):
+        """Atomically replace a JSON file so a crash never leaves a partial write"""
+        tmp_file = filepath.with_suffix(".json.tmp")
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(orjson.dumps(data, default=str, option=JSON_OPTIONS))
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(tmp_file, filepath)
+
     async def save_company_data(self, company_data: Dict, symbol: str):
         """Save individual company data to JSON file"""
         filepath = self.assets_dir / f"{symbol}.json"
         
-        with open(filepath, 'w') as f:
-            json.dump(company_data, f, indent=2, default=str)
+        # Serialize and write in a worker thread so other companies keep going
+        await asyncio.to_thread(self._write_json, filepath, company_data)
         
         print(f"💾 Saved {symbol} data to {filepath}")
 
@@ -209,45 +412,60 @@ class SP500DataCollector:
         """Save consolidated S&P 500 data"""
         filepath = self.assets_dir / "sp500_companies.json"
         
-        with open(filepath, 'w') as f:
-            json.dump(all_companies, f, indent=2, default=str)
+        await asyncio.to_thread(self._write_json, filepath, all_companies)
         
         print(f"💾 Saved consolidated data to {filepath}")
         
-        # Also save summary statistics
+        # Also save summary statistics; market caps go into one array and
+        # sectors into one Counter rather than a pass over the list for each
+        market_caps = np.fromiter(
+            (c.get("market_cap") or 0.0 for c in all_companies),
+            dtype=np.float64, count=len(all_companies)
+        )
+        sectors = Counter(c.get("sector", "Unknown") for c in all_companies)
         summary = {
             "total_companies": len(all_companies),
-            "sectors": {},
-            "last_updated": datetime.now().isoformat(),
+            "sectors": dict(sectors),
+            "last_updated": self.run_timestamp,
             "data_sources": ["yfinance", "wikipedia"],
-            "avg_market_cap": sum([c.get("market_cap", 0) or 0 for c in all_companies]) / len(all_companies),
-            "total_market_cap": sum([c.get("market_cap", 0) or 0 for c in all_companies]),
+            "avg_market_cap": float(market_caps.mean()) if len(market_caps) else 0.0,
+            "total_market_cap": float(market_caps.sum()),
         }
         
-        # Count companies by sector
-        for company in all_companies:
-            sector = company.get("sector", "Unknown")
-            summary["sectors"][sector] = summary["sectors"].get(sector, 0) + 1
-        
         summary_filepath = self.assets_dir / "sp500_summary.json"
-        with open(summary_filepath, 'w') as f:
-            json.dump(summary, f, indent=2, default=str)
+        self._write_json(summary_filepath, summary)
         
         print(f"📊 Saved summary statistics to {summary_filepath}")
 
-    async def process_company(self, company: Dict, index: int, total: int) -> Dict:
+    def _has_recent_data(self, symbol: str) -> bool:
+        """Whether resuming can reuse the saved file for a symbol"""
+        if not self.resume:
+            return False
+        try:
+            return time.time() - (self.assets_dir / f"{symbol}.json").stat().st_mtime < RESUME_MAX_AGE
+        except FileNotFoundError:
+            return False
+
+    async def process_company(self, company: Dict, index: int, total: int,
+                              price_fields: Optional[Dict] = None) -> Dict:
         """Process a single company with all data enrichment"""
         symbol = company["symbol"]
-        print(f"🔄 Processing {symbol} ({index+1}/{total})...")
         
-        # Get enhanced company info
-        enhanced_info = await self.get_enhanced_company_info(symbol)
+        # Reuse a recent saved file when resuming
+        if self._has_recent_data(symbol):
+            print(f"⏭️  Skipping {symbol} ({index+1}/{total}), saved data is recent")
+            filepath = self.assets_dir / f"{symbol}.json"
+            return orjson.loads(await asyncio.to_thread(filepath.read_bytes))
         
-        # Get earnings data
-        earnings_data = await self.get_earnings_calendar_data(symbol)
+        print(f"🔄 Processing {symbol} ({index+1}/{total})...")
         
-        # Get analyst data
-        analyst_data = await self.get_analyst_data(symbol)
+        # Fetch everything from one Ticker in a single thread hop, then extract
+        # enhanced company info, earnings data and analyst data from it
+        async with self.rate_limiter:
+            bundle = await asyncio.to_thread(self._fetch_symbol_bundle, symbol, price_fields is None)
+        enhanced_info = self._extract_company_info(symbol, bundle["info"], bundle["history"], price_fields)
+        earnings_data = self._extract_earnings(symbol, bundle["quarterly_earnings"], bundle["calendar"])
+        analyst_data = self._extract_analyst_data(symbol, bundle["info"], bundle["recommendations"])
         
         # Combine all data
         complete_company_data = {
@@ -255,7 +473,7 @@ class SP500DataCollector:
             **enhanced_info,  # Enhanced financial data
             "earnings_history": earnings_data,
             "analyst_data": analyst_data,
-            "last_updated": datetime.now().isoformat(),
+            "last_updated": self.run_timestamp,
             "data_quality": {
                 "has_financial_data": bool(enhanced_info.get("market_cap")),
                 "has_earnings_data": len(earnings_data) > 0,
@@ -271,15 +489,15 @@ class SP500DataCollector:
         # Save individual company file
         await self.save_company_data(complete_company_data, symbol)
         
-        # Add delay to respect rate limits
-        await asyncio.sleep(1.2)  # Slightly longer delay for comprehensive data
-        
         return complete_company_data
 
     async def collect_all_data(self, limit: Optional[int] = None):
         """Main method to collect all S&P 500 data"""
         print("🚀 Starting comprehensive S&P 500 data collection...")
         
+        # One timestamp for the whole run, shared by every company and the summary
+        self.run_timestamp = datetime.now().isoformat()
+        
         # Get complete company list
         companies = await self.get_complete_sp500_list()
         if not companies:
@@ -291,17 +509,49 @@ class SP500DataCollector:
             companies = companies[:limit]
             print(f"📊 Processing first {limit} companies for testing")
         
-        # Process all companies
+        # Download price history for all companies in batches up front;
+        # companies missing from it fall back to a per-symbol history request
+        prices = self._fetch_batch([
+            company["symbol"] for company in companies if not self._has_recent_data(company["symbol"])
+        ])
+        
+        # Process all companies, a bounded number at a time; yfinance calls run
+        # in worker threads so companies overlap while waiting on the network
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_COMPANIES)
+        
+        completed = {}
+        
+        async def guarded(i: int, company: Dict) -> Dict:
+            async with semaphore:
+                result = await self.process_company(
+                    company, i, len(companies), prices.get(company["symbol"])
+                )
+            completed[i] = result
+            return result
+        
+        try:
+            results = await asyncio.gather(
+                *(guarded(i, company) for i, company in enumerate(companies)),
+                return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            # Interrupted (e.g. Ctrl-C): keep the companies processed so far
+            if completed:
+                print(f"\n⚠️  Interrupted, saving {len(completed)} processed companies")
+                await self.save_consolidated_data([completed[i] for i in sorted(completed)])
+            raise
+        
         all_enhanced_companies = []
         failed_companies = []
         
-        for i, company in enumerate(companies):
-            try:
-                enhanced_company = await self.process_company(company, i, len(companies))
-                all_enhanced_companies.append(enhanced_company)
-            except Exception as e:
-                print(f"❌ Failed to process {company.get('symbol', 'Unknown')}: {e}")
+        for company, result in zip(companies, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            if isinstance(result, Exception):
+                print(f"❌ Failed to process {company.get('symbol', 'Unknown')}: {result}")
                 failed_companies.append(company)
+            else:
+                all_enhanced_companies.append(result)
         
         # Save consolidated data
         await self.save_consolidated_data(all_enhanced_companies)
@@ -317,9 +567,11 @@ class SP500DataCollector:
             print(f"⚠️  Failed companies: {', '.join([c.get('symbol', 'Unknown') for c in failed_companies])}")
         
         # Data quality summary
-        high_quality = sum(1 for c in all_enhanced_companies if c.get('data_quality', {}).get('completeness_score', 0) >= 0.8)
-        medium_quality = sum(1 for c in all_enhanced_companies if 0.5 <= c.get('data_quality', {}).get('completeness_score', 0) < 0.8)
-        low_quality = sum(1 for c in all_enhanced_companies if c.get('data_quality', {}).get('completeness_score', 0) < 0.5)
+        scores = np.fromiter(
+            (c.get('data_quality', {}).get('completeness_score', 0) for c in all_enhanced_companies),
+            dtype=np.float64, count=len(all_enhanced_companies)
+        )
+        low_quality, medium_quality, high_quality = np.bincount(np.digitize(scores, [0.5, 0.8]), minlength=3)
         
         print(f"📊 Data Quality:")
         print(f"   🟢 High quality (80%+): {high_quality} companies")
@@ -340,7 +592,7 @@ async def main():
     
     args = parser.parse_args()
     
-    collector = SP500DataCollector()
+    collector = SP500DataCollector(resume=args.resume)
     await collector.collect_all_data(limit=args.limit)
 
 
@@ -0,0 +1,54 @@
+"""Tests for EPS surprise classification in the earnings MCP server"""
+import sys
+from bisect import bisect_left
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "mcp_servers"))
+
+import earnings_server  # noqa: E402
+
+# (actual_eps, expected_eps, category): NaN, each bin edge, and a value inside each bin
+SURPRISE_CASES = [
+    ("nan", 1.0, "Miss"),
+    (1.0, "nan", "Miss"),
+    (90.0, 100.0, "Miss"),
+    (95.0, 100.0, "Miss"),
+    (97.0, 100.0, "Meet/Minor Miss"),
+    (100.0, 100.0, "Meet/Minor Miss"),
+    (102.0, 100.0, "Beat"),
+    (105.0, 100.0, "Beat"),
+    (110.0, 100.0, "Strong Beat"),
+]
+
+
+@pytest.fixture(params=[True, False], ids=["numba", "numpy"])
+def classifier_path(request, monkeypatch):
+    """Run the batch tool through the compiled kernel and through the NumPy fallback"""
+    if request.param and not earnings_server.HAS_NUMBA:
+        pytest.skip("numba is not installed")
+    monkeypatch.setattr(earnings_server, "HAS_NUMBA", request.param)
+
+
+async def test_batch_surprise_categories(classifier_path):
+    earnings_results = [
+        {"symbol": f"T{i}", "actual_eps": actual, "expected_eps": expected}
+        for i, (actual, expected, _) in enumerate(SURPRISE_CASES)
+    ]
+
+    result = await earnings_server.analyze_earnings_surprise_batch(earnings_results)
+
+    categories = [analysis["eps_analysis"]["category"] for analysis in result["analyses"]]
+    assert categories == [category for _, _, category in SURPRISE_CASES]
+
+
+@pytest.mark.parametrize("actual, expected, category", SURPRISE_CASES)
+def test_scalar_category_matches_batch(actual, expected, category):
+    # analyze_earnings_surprise computes one percentage and classifies it with bisect_left
+    actual, expected = float(actual), float(expected)
+    surprise_percent = (actual - expected) / expected * 100
+    scalar = earnings_server.SURPRISE_CATEGORIES[
+        bisect_left(earnings_server.SURPRISE_BINS, surprise_percent)
+    ]
+    assert scalar == category
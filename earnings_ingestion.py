@@ -5,19 +5,30 @@ Fetches real earnings data and populates PostgreSQL database
 """
 
 import os
+import io
+import csv
 import json
 import logging
 import asyncio
-from datetime import datetime, timedelta, date
+import time
+import struct
+from contextlib import nullcontext
+from datetime import datetime, date
 from typing import List, Dict, Optional
 import pandas as pd
 import requests
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from sqlalchemy import create_engine, text
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
+# ONNX Runtime is optional; without it embeddings run on the PyTorch model
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +37,147 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Alpha Vantage requests in flight at once, and the key's per-minute quota
+# (5 on the free tier; premium keys allow 75 and up)
+ALPHA_VANTAGE_CONCURRENCY = 10
+ALPHA_VANTAGE_CALLS_PER_MINUTE = int(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '5'))
+
+# Base EPS estimate per GICS sector for mock future earnings
+SECTOR_BASE_EPS = {
+    'Information Technology': 2.5,
+    'Health Care': 2.0,
+    'Financials': 3.0,
+    'Consumer Discretionary': 1.8,
+    'Communication Services': 1.5,
+    'Industrials': 2.2,
+    'Consumer Staples': 1.6,
+    'Energy': 2.8,
+    'Utilities': 1.4,
+    'Real Estate': 1.2,
+    'Materials': 2.0
+}
+
+# int8-quantized ONNX export of all-MiniLM-L6-v2, used when present. Build it with:
+#   optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 --task feature-extraction onnx/
+#   optimum-cli onnxruntime quantize --avx512_vnni --onnx_model onnx/ -o onnx-int8/
+EMBEDDING_ONNX_DIR = os.getenv('EMBEDDING_ONNX_DIR', 'onnx-int8')
+# The quantized export has no tokenizer files; point this at the unquantized export
+# (onnx/) to load the tokenizer offline
+EMBEDDING_TOKENIZER = os.getenv('EMBEDDING_TOKENIZER', 'sentence-transformers/all-MiniLM-L6-v2')
+EMBEDDING_MAX_TOKENS = 256  # all-MiniLM-L6-v2's max_seq_length
+
+# Drop and rebuild the earnings indexes around a load only when the batch is at
+# least this fraction of the rows already in the table
+INDEX_REBUILD_FRACTION = 0.2
+
+# PostgreSQL binary COPY framing, and field encoders for the earnings staging columns
+_PG_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+_PG_COPY_TRAILER = struct.pack('>h', -1)
+_PG_NULL = struct.pack('>i', -1)
+_PG_EPOCH = date(2000, 1, 1)
+
+_encode_int4 = struct.Struct('>i').pack
+_encode_float8 = struct.Struct('>d').pack
+
+
+def _encode_text(value: str) -> bytes:
+    return value.encode('utf-8')
+
+
+def _encode_date(value: date) -> bytes:
+    return _encode_int4((value - _PG_EPOCH).days)
+
+
+def _encode_vector(value: np.ndarray) -> bytes:
+    # pgvector's binary form: uint16 dimensions, uint16 unused, big-endian float4s
+    return struct.pack('>HH', len(value), 0) + value.astype('>f4').tobytes()
+
+
+_EARNINGS_STG_ENCODERS = (
+    _encode_int4, _encode_text, _encode_date, _encode_int4, _encode_int4,
+    _encode_float8, _encode_float8, _encode_text, _encode_int4,
+    _encode_text, _encode_float8, _encode_float8, _encode_text,
+    _encode_vector
+)
+_EARNINGS_STG_FIELDS = struct.pack('>h', len(_EARNINGS_STG_ENCODERS))
+
+
+def _write_copy_row(buffer: io.BytesIO, row: tuple):
+    """Append one earnings_stg tuple in binary COPY format; None is written as NULL"""
+    buffer.write(_EARNINGS_STG_FIELDS)
+    for value, encode in zip(row, _EARNINGS_STG_ENCODERS):
+        if value is None:
+            buffer.write(_PG_NULL)
+        else:
+            data = encode(value)
+            buffer.write(_encode_int4(len(data)))
+            buffer.write(data)
+
+
+def _fast_iso_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date by slicing, falling back to strptime for other layouts"""
+    if len(value) == 10 and value[4] == value[7] == '-':
+        return date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class OnnxSentenceEncoder:
+    """Mean-pooled sentence embeddings from an ONNX Runtime model, supporting the
+    SentenceTransformer.encode() arguments used here"""
+    
+    def __init__(self, model_dir: str, tokenizer: str = EMBEDDING_TOKENIZER):
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_dir, file_name='model_quantized.onnx')
+    
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, normalize_embeddings: bool = False) -> np.ndarray:
+        # Batch texts of similar length together so padding stays small
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                [texts[i] for i in order[start:start + batch_size]],
+                padding=True, truncation=True, max_length=EMBEDDING_MAX_TOKENS, return_tensors='np'
+            )
+            token_embeddings = self.model(**inputs).last_hidden_state
+            mask = inputs['attention_mask'][:, :, None].astype(np.float32)
+            batches.append((token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9))
+        
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+
+class AsyncRateLimiter:
+    """Token bucket allowing max_rate entries per time_period seconds on average"""
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.max_rate,
+                    self._tokens + (now - self._updated) * self.max_rate / self.time_period
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
 
 class EarningsDataIngestion:
     def __init__(self):
@@ -44,28 +196,80 @@ class EarningsDataIngestion:
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_KEY', 'demo')
         self.finnhub_key = os.getenv('FINNHUB_KEY', 'demo')
         
+        # Pooled HTTP session shared by the concurrent fetch threads
+        self.http_session = requests.Session()
+        
         # Initialize sentence transformer for embeddings
-        try:
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("✅ Loaded sentence transformer model")
-        except Exception as e:
-            logger.error(f"❌ Failed to load embedding model: {e}")
-            self.embedding_model = None
+        self.embedding_model = None
+        if ORTModelForFeatureExtraction is not None and os.path.isdir(EMBEDDING_ONNX_DIR):
+            try:
+                self.embedding_model = OnnxSentenceEncoder(EMBEDDING_ONNX_DIR)
+                logger.info("✅ Loaded quantized ONNX sentence transformer model")
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to load ONNX model, using sentence transformer: {e}")
+        
+        if self.embedding_model is None:
+            try:
+                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                logger.info("✅ Loaded sentence transformer model")
+            except Exception as e:
+                logger.error(f"❌ Failed to load embedding model: {e}")
+        
+        # Embeddings of the company part of earnings texts, keyed by that text
+        self.prefix_embeddings = {}
+        
+        # Random source for mock future earnings
+        self.rng = np.random.default_rng()
         
-        self.engine = None
+        self.conn = None
         self.sp500_companies = []
+        self.company_ids = {}
     
     def connect_to_database(self):
         """Connect to PostgreSQL database"""
         try:
-            # Create SQLAlchemy engine
-            db_url = f"postgresql://{self.db_config['user']}:{self.db_config['password']}@{self.db_config['host']}:{self.db_config['port']}/{self.db_config['database']}"
-            self.engine = create_engine(db_url)
+            # One connection for the whole run
+            self.conn = psycopg2.connect(**self.db_config)
             
-            # Test connection
-            with self.engine.connect() as conn:
-                result = conn.execute(text("SELECT 1"))
-                logger.info("✅ Connected to PostgreSQL database")
+            # Session-lifetime earnings staging table and its merge statement, so the
+            # upsert is parsed and planned once per connection instead of per batch
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE earnings_stg (
+                        company_id INTEGER, symbol TEXT, earnings_date DATE,
+                        quarter INTEGER, year INTEGER,
+                        actual_eps DOUBLE PRECISION, estimated_eps DOUBLE PRECISION,
+                        consensus_rating TEXT, num_analysts INTEGER,
+                        beat_miss_meet TEXT, surprise_percent DOUBLE PRECISION,
+                        confidence_score DOUBLE PRECISION, announcement_time TEXT,
+                        earnings_embedding vector
+                    ) ON COMMIT DELETE ROWS
+                """)
+                cur.execute("""
+                    PREPARE merge_earnings AS
+                    INSERT INTO earnings (
+                        company_id, symbol, earnings_date, quarter, year,
+                        actual_eps, estimated_eps, consensus_rating, num_analysts,
+                        beat_miss_meet, surprise_percent, confidence_score,
+                        announcement_time, earnings_embedding
+                    )
+                    SELECT company_id, symbol, earnings_date, quarter, year,
+                           actual_eps, estimated_eps, consensus_rating, num_analysts,
+                           beat_miss_meet, surprise_percent, confidence_score,
+                           announcement_time, earnings_embedding
+                    FROM earnings_stg
+                    ON CONFLICT (symbol, earnings_date, quarter, year)
+                    DO UPDATE SET
+                        actual_eps = EXCLUDED.actual_eps,
+                        estimated_eps = EXCLUDED.estimated_eps,
+                        consensus_rating = EXCLUDED.consensus_rating,
+                        beat_miss_meet = EXCLUDED.beat_miss_meet,
+                        surprise_percent = EXCLUDED.surprise_percent,
+                        confidence_score = EXCLUDED.confidence_score,
+                        updated_at = CURRENT_TIMESTAMP
+                """)
+            self.conn.commit()
+            logger.info("✅ Connected to PostgreSQL database")
             
             return True
         except Exception as e:
@@ -85,81 +289,135 @@ class EarningsDataIngestion:
     
     def populate_companies_table(self):
         """Populate companies table with S&P 500 data"""
-        if not self.sp500_companies or not self.engine:
+        if not self.sp500_companies or not self.conn:
             return False
         
+        # Last entry wins for a repeated symbol, as with one upsert per company
+        companies = {company.get('symbol', ''): company for company in self.sp500_companies}
+        
+        # Parse every date_added at once: YYYY-MM-DD first, then 'March 4, 1957' style
+        raw_dates = pd.Series([company.get('date_added') or None for company in companies.values()], dtype=object)
+        dates_added = (
+            pd.to_datetime(raw_dates, format='%Y-%m-%d', errors='coerce')
+            .fillna(pd.to_datetime(raw_dates, format='%B %d, %Y', errors='coerce'))
+            .dt.strftime('%Y-%m-%d')
+            .fillna('')
+        )
+        
+        # Build the whole load as one CSV stream; an empty date_added is loaded as NULL
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+        for (symbol, company), date_added in zip(companies.items(), dates_added):
+            writer.writerow([
+                symbol,
+                company.get('company_name', ''),
+                company.get('gics_sector', ''),
+                company.get('gics_sub_industry', ''),
+                company.get('headquarters', ''),
+                date_added,
+                company.get('cik', ''),
+                company.get('founded', '')
+            ])
+        buffer.seek(0)
+        
         try:
-            with self.engine.connect() as conn:
-                for company in self.sp500_companies:
-                    # Parse date_added
-                    date_added = None
-                    if company.get('date_added'):
-                        try:
-                            date_added = datetime.strptime(company['date_added'], '%Y-%m-%d').date()
-                        except:
-                            try:
-                                date_added = datetime.strptime(company['date_added'], '%B %d, %Y').date()
-                            except:
-                                pass
-                    
-                    # Insert or update company
-                    query = text("""
-                        INSERT INTO companies (symbol, company_name, gics_sector, gics_sub_industry, 
-                                             headquarters, date_added, cik, founded)
-                        VALUES (:symbol, :company_name, :gics_sector, :gics_sub_industry, 
-                                :headquarters, :date_added, :cik, :founded)
-                        ON CONFLICT (symbol) 
-                        DO UPDATE SET 
-                            company_name = EXCLUDED.company_name,
-                            gics_sector = EXCLUDED.gics_sector,
-                            gics_sub_industry = EXCLUDED.gics_sub_industry,
-                            headquarters = EXCLUDED.headquarters,
-                            updated_at = CURRENT_TIMESTAMP
-                    """)
-                    
-                    conn.execute(query, {
-                        'symbol': company.get('symbol', ''),
-                        'company_name': company.get('company_name', ''),
-                        'gics_sector': company.get('gics_sector', ''),
-                        'gics_sub_industry': company.get('gics_sub_industry', ''),
-                        'headquarters': company.get('headquarters', ''),
-                        'date_added': date_added,
-                        'cik': company.get('cik', ''),
-                        'founded': company.get('founded', '')
-                    })
-                
-                conn.commit()
-                logger.info(f"✅ Populated companies table with {len(self.sp500_companies)} companies")
-                return True
+            with self.conn.cursor() as cur:
+                # COPY into a staging table, then merge with a single upsert
+                cur.execute("""
+                    CREATE TEMP TABLE companies_stg ON COMMIT DROP AS
+                    SELECT symbol, company_name, gics_sector, gics_sub_industry,
+                           headquarters, date_added, cik, founded
+                    FROM companies WITH NO DATA
+                """)
+                cur.copy_expert("""
+                    COPY companies_stg (symbol, company_name, gics_sector, gics_sub_industry,
+                                        headquarters, date_added, cik, founded)
+                    FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (symbol, company_name, gics_sector,
+                                     gics_sub_industry, headquarters, cik, founded))
+                """, buffer)
+                cur.execute("""
+                    INSERT INTO companies (symbol, company_name, gics_sector, gics_sub_industry, 
+                                         headquarters, date_added, cik, founded)
+                    SELECT symbol, company_name, gics_sector, gics_sub_industry,
+                           headquarters, date_added, cik, founded
+                    FROM companies_stg
+                    ON CONFLICT (symbol) 
+                    DO UPDATE SET 
+                        company_name = EXCLUDED.company_name,
+                        gics_sector = EXCLUDED.gics_sector,
+                        gics_sub_industry = EXCLUDED.gics_sub_industry,
+                        headquarters = EXCLUDED.headquarters,
+                        updated_at = CURRENT_TIMESTAMP
+                """)
+            self.conn.commit()
+            
+            # Ids of newly inserted companies are picked up on the next lookup
+            self.company_ids = {}
+            logger.info(f"✅ Populated companies table with {len(self.sp500_companies)} companies")
+            return True
                 
         except Exception as e:
+            self.conn.rollback()
             logger.error(f"❌ Failed to populate companies table: {e}")
             return False
     
-    def generate_earnings_embedding(self, earnings_data: Dict) -> Optional[List[float]]:
-        """Generate vector embedding for earnings data"""
-        if not self.embedding_model:
-            return None
-        
-        try:
-            # Create text representation of earnings data
-            text_repr = f"""
+    def _earnings_prefix_text(self, earnings_data: Dict) -> str:
+        """Company part of the earnings text, shared by every record of a company"""
+        return f"""
             Company: {earnings_data.get('symbol', '')}
             Sector: {earnings_data.get('sector', '')}
+            """.strip()
+    
+    def _earnings_detail_text(self, earnings_data: Dict) -> str:
+        """Per-record part of the earnings text"""
+        return f"""
             Quarter: Q{earnings_data.get('quarter', '')} {earnings_data.get('year', '')}
             Estimated EPS: {earnings_data.get('estimated_eps', 'N/A')}
             Actual EPS: {earnings_data.get('actual_eps', 'N/A')}
             Beat/Miss: {earnings_data.get('beat_miss_meet', 'N/A')}
             Consensus: {earnings_data.get('consensus_rating', 'N/A')}
             """.strip()
+    
+    def _encode_normalized(self, texts: List[str]) -> np.ndarray:
+        """Batched, L2-normalized float32 embeddings of texts"""
+        # encode() sorts texts by length before batching, so padding stays small
+        return self.embedding_model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True
+        )
+    
+    def generate_earnings_embedding(self, earnings_data: Dict) -> Optional[List[float]]:
+        """Generate vector embedding for earnings data"""
+        embedding = self.generate_earnings_embeddings([earnings_data])[0]
+        return embedding.tolist() if embedding is not None else None
+    
+    def generate_earnings_embeddings(self, earnings_list: List[Dict]) -> List[Optional[np.ndarray]]:
+        """Generate float32 vector embeddings for many earnings records.
+        
+        Each embedding is the mean of the normalized company prefix embedding, computed
+        once per company and cached, and the normalized embedding of the record's
+        quarter, EPS and rating details. Only the short detail texts go through the
+        model for every record, in one batched call.
+        """
+        if not self.embedding_model or not earnings_list:
+            return [None] * len(earnings_list)
+        
+        try:
+            prefixes = [self._earnings_prefix_text(earnings) for earnings in earnings_list]
+            missing = [prefix for prefix in dict.fromkeys(prefixes) if prefix not in self.prefix_embeddings]
+            if missing:
+                self.prefix_embeddings.update(zip(missing, self._encode_normalized(missing)))
             
-            # Generate embedding
-            embedding = self.embedding_model.encode(text_repr)
-            return embedding.tolist()
+            details = self._encode_normalized([self._earnings_detail_text(earnings) for earnings in earnings_list])
+            prefix_embeddings = np.stack([self.prefix_embeddings[prefix] for prefix in prefixes])
+            return list((prefix_embeddings + details) / 2)
             
         except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            return None
+            logger.error(f"Error generating embeddings: {e}")
+            return [None] * len(earnings_list)
     
     def fetch_earnings_data_alpha_vantage(self, symbol: str) -> List[Dict]:
         """Fetch earnings data from Alpha Vantage"""
@@ -171,7 +429,7 @@ class EarningsDataIngestion:
                 'apikey': self.alpha_vantage_key
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = self.http_session.get(url, params=params, timeout=30)
             if response.status_code != 200:
                 return []
             
@@ -191,7 +449,7 @@ class EarningsDataIngestion:
                     continue
                 
                 try:
-                    earnings_date = datetime.strptime(fiscal_date, '%Y-%m-%d').date()
+                    earnings_date = _fast_iso_date(fiscal_date)
                     quarter = ((earnings_date.month - 1) // 3) + 1
                     
                     # Extract numeric values
@@ -243,128 +501,163 @@ class EarningsDataIngestion:
     
     def generate_mock_future_earnings(self, symbol: str, company_data: Dict) -> List[Dict]:
         """Generate realistic mock future earnings data"""
-        earnings_list = []
-        current_date = date.today()
-        
-        # Generate next 4 quarters
-        for q in range(1, 5):
-            # Calculate next earnings date (roughly every 3 months)
-            earnings_date = current_date + timedelta(days=q * 90 + np.random.randint(-15, 15))
-            quarter = ((earnings_date.month - 1) // 3) + 1
-            
-            # Generate realistic estimates based on sector
-            sector = company_data.get('gics_sector', '')
-            base_eps = self._get_sector_base_eps(sector)
-            
-            # Add some randomness but keep it realistic
-            estimated_eps = base_eps * (1 + np.random.normal(0, 0.1))
-            
-            # Assign consensus rating based on sector trends
-            consensus_ratings = ['Buy', 'Hold', 'Sell']
-            weights = [0.5, 0.4, 0.1] if 'Technology' in sector else [0.3, 0.5, 0.2]
-            consensus_rating = np.random.choice(consensus_ratings, p=weights)
-            
-            earnings_data = {
-                'symbol': symbol,
-                'earnings_date': earnings_date,
-                'quarter': quarter,
-                'year': earnings_date.year,
-                'estimated_eps': round(estimated_eps, 2),
-                'consensus_rating': consensus_rating,
-                'num_analysts': np.random.randint(8, 25),
-                'confidence_score': np.random.uniform(0.6, 0.9),
-                'announcement_time': np.random.choice(['BMO', 'AMC'])
-            }
-            
-            earnings_list.append(earnings_data)
+        return self.generate_mock_future_earnings_bulk([symbol], [company_data])[0]
+    
+    def generate_mock_future_earnings_bulk(self, symbols: List[str], companies: List[Dict]) -> List[List[Dict]]:
+        """Generate realistic mock future earnings data for the next 4 quarters of
+        every company, drawing all random values as (companies, quarters) arrays"""
+        shape = (len(symbols), 4)
+        sectors = [company.get('gics_sector', '') for company in companies]
+        
+        # Calculate next earnings dates (roughly every 3 months)
+        day_offsets = np.arange(1, 5) * 90 + self.rng.integers(-15, 15, size=shape)
+        earnings_dates = np.datetime64(date.today(), 'D') + day_offsets
+        quarters = (earnings_dates.astype('datetime64[M]').astype(int) % 12) // 3 + 1
+        years = earnings_dates.astype('datetime64[Y]').astype(int) + 1970
+        
+        # Generate realistic estimates based on sector, with some randomness
+        base_eps = np.fromiter((SECTOR_BASE_EPS.get(sector, 2.0) for sector in sectors), dtype=np.float64, count=len(sectors))
+        estimated_eps = np.round(base_eps[:, None] * (1 + self.rng.normal(0, 0.1, size=shape)), 2)
         
-        return earnings_list
+        # Assign consensus ratings (Buy, Hold, Sell) based on sector trends
+        weights = np.array([[0.5, 0.4, 0.1] if 'Technology' in sector else [0.3, 0.5, 0.2] for sector in sectors]).reshape(-1, 3)
+        cumulative_weights = np.cumsum(weights, axis=1)
+        rating_index = (self.rng.random(shape)[:, :, None] >= cumulative_weights[:, None, :2]).sum(axis=2)
+        consensus_ratings = np.array(['Buy', 'Hold', 'Sell'])[rating_index]
+        
+        num_analysts = self.rng.integers(8, 25, size=shape)
+        confidence_scores = self.rng.uniform(0.6, 0.9, size=shape)
+        announcement_times = np.array(['BMO', 'AMC'])[self.rng.integers(0, 2, size=shape)]
+        
+        columns = zip(
+            earnings_dates.tolist(), quarters.tolist(), years.tolist(), estimated_eps.tolist(),
+            consensus_ratings.tolist(), num_analysts.tolist(), confidence_scores.tolist(),
+            announcement_times.tolist()
+        )
+        return [
+            [
+                {
+                    'symbol': symbol,
+                    'earnings_date': earnings_date,
+                    'quarter': quarter,
+                    'year': year,
+                    'estimated_eps': eps,
+                    'consensus_rating': rating,
+                    'num_analysts': analysts,
+                    'confidence_score': confidence,
+                    'announcement_time': announcement
+                }
+                for earnings_date, quarter, year, eps, rating, analysts, confidence, announcement in zip(*row)
+            ]
+            for symbol, row in zip(symbols, columns)
+        ]
     
     def _get_sector_base_eps(self, sector: str) -> float:
         """Get base EPS estimate for sector"""
-        sector_eps_map = {
-            'Information Technology': 2.5,
-            'Health Care': 2.0,
-            'Financials': 3.0,
-            'Consumer Discretionary': 1.8,
-            'Communication Services': 1.5,
-            'Industrials': 2.2,
-            'Consumer Staples': 1.6,
-            'Energy': 2.8,
-            'Utilities': 1.4,
-            'Real Estate': 1.2,
-            'Materials': 2.0
-        }
-        return sector_eps_map.get(sector, 2.0)
+        return SECTOR_BASE_EPS.get(sector, 2.0)
     
-    def insert_earnings_data(self, earnings_list: List[Dict]) -> bool:
-        """Insert earnings data into database"""
-        if not earnings_list or not self.engine:
+    def load_company_ids(self) -> bool:
+        """Cache the symbol -> companies.id mapping used to link earnings rows"""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT symbol, id FROM companies")
+                self.company_ids = dict(cur.fetchall())
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"❌ Failed to load company ids: {e}")
+            return False
+    
+    def insert_earnings_data(self, earnings_list: List[Dict], rebuild_indexes: Optional[bool] = None) -> bool:
+        """Insert earnings data into database.
+        
+        With rebuild_indexes, the secondary indexes on earnings are dropped before the
+        load and rebuilt once after it, in the same transaction, which is cheaper than
+        maintaining them row by row for a bulk load. Left as None, this is done only
+        when the batch is large next to the table's estimated row count.
+        """
+        if not earnings_list or not self.conn:
+            return False
+        
+        if not self.company_ids and not self.load_company_ids():
             return False
         
+        # Last record wins for a repeated key, as one upsert cannot touch a row twice
+        matched = {}
+        for earnings in earnings_list:
+            company_id = self.company_ids.get(earnings['symbol'])
+            if company_id is None:
+                logger.warning(f"Company not found: {earnings['symbol']}")
+                continue
+            
+            key = (earnings['symbol'], earnings['earnings_date'], earnings['quarter'], earnings['year'])
+            matched[key] = (company_id, earnings)
+        
+        # Generate embeddings for every row in one batched call
+        embeddings = self.generate_earnings_embeddings([earnings for _, earnings in matched.values()])
+        
+        # Binary COPY stream: header, one tuple per row, then the -1 trailer
+        buffer = io.BytesIO()
+        buffer.write(_PG_COPY_HEADER)
+        for (company_id, earnings), embedding in zip(matched.values(), embeddings):
+            _write_copy_row(buffer, (
+                company_id,
+                earnings['symbol'],
+                earnings['earnings_date'],
+                earnings['quarter'],
+                earnings['year'],
+                earnings.get('actual_eps'),
+                earnings.get('estimated_eps'),
+                earnings.get('consensus_rating'),
+                earnings.get('num_analysts'),
+                earnings.get('beat_miss_meet'),
+                earnings.get('surprise_percent'),
+                earnings.get('confidence_score', 0.5),
+                earnings.get('announcement_time'),
+                embedding
+            ))
+        buffer.write(_PG_COPY_TRAILER)
+        buffer.seek(0)
+        
         try:
-            with self.engine.connect() as conn:
-                for earnings in earnings_list:
-                    # Get company_id
-                    company_query = text("SELECT id FROM companies WHERE symbol = :symbol")
-                    result = conn.execute(company_query, {'symbol': earnings['symbol']})
-                    company_row = result.fetchone()
-                    
-                    if not company_row:
-                        logger.warning(f"Company not found: {earnings['symbol']}")
-                        continue
-                    
-                    company_id = company_row[0]
-                    
-                    # Generate embedding
-                    embedding = self.generate_earnings_embedding(earnings)
+            with self.conn.cursor() as cur:
+                if rebuild_indexes is None:
+                    # Rebuilding scans the whole table, so a small batch into a
+                    # large table is cheaper with the indexes kept in place
+                    cur.execute("SELECT reltuples FROM pg_class WHERE oid = 'earnings'::regclass")
+                    existing_rows = max(cur.fetchone()[0], 0)  # -1 until first analyzed
+                    rebuild_indexes = len(matched) >= INDEX_REBUILD_FRACTION * existing_rows
+                
+                index_definitions = []
+                if rebuild_indexes:
+                    cur.execute("SET LOCAL synchronous_commit = off")
+                    cur.execute("SET LOCAL maintenance_work_mem = '1GB'")
                     
-                    # Insert earnings data
-                    query = text("""
-                        INSERT INTO earnings (
-                            company_id, symbol, earnings_date, quarter, year,
-                            actual_eps, estimated_eps, consensus_rating, num_analysts,
-                            beat_miss_meet, surprise_percent, confidence_score,
-                            announcement_time, earnings_embedding
-                        ) VALUES (
-                            :company_id, :symbol, :earnings_date, :quarter, :year,
-                            :actual_eps, :estimated_eps, :consensus_rating, :num_analysts,
-                            :beat_miss_meet, :surprise_percent, :confidence_score,
-                            :announcement_time, :earnings_embedding
-                        )
-                        ON CONFLICT (symbol, earnings_date, quarter, year)
-                        DO UPDATE SET
-                            actual_eps = EXCLUDED.actual_eps,
-                            estimated_eps = EXCLUDED.estimated_eps,
-                            consensus_rating = EXCLUDED.consensus_rating,
-                            beat_miss_meet = EXCLUDED.beat_miss_meet,
-                            surprise_percent = EXCLUDED.surprise_percent,
-                            confidence_score = EXCLUDED.confidence_score,
-                            updated_at = CURRENT_TIMESTAMP
+                    # Constraint indexes stay; ON CONFLICT needs the unique key
+                    cur.execute("""
+                        SELECT indexname, indexdef FROM pg_indexes i
+                        WHERE schemaname = current_schema() AND tablename = 'earnings'
+                          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
                     """)
-                    
-                    conn.execute(query, {
-                        'company_id': company_id,
-                        'symbol': earnings['symbol'],
-                        'earnings_date': earnings['earnings_date'],
-                        'quarter': earnings['quarter'],
-                        'year': earnings['year'],
-                        'actual_eps': earnings.get('actual_eps'),
-                        'estimated_eps': earnings.get('estimated_eps'),
-                        'consensus_rating': earnings.get('consensus_rating'),
-                        'num_analysts': earnings.get('num_analysts'),
-                        'beat_miss_meet': earnings.get('beat_miss_meet'),
-                        'surprise_percent': earnings.get('surprise_percent'),
-                        'confidence_score': earnings.get('confidence_score', 0.5),
-                        'announcement_time': earnings.get('announcement_time'),
-                        'earnings_embedding': embedding
-                    })
+                    index_definitions = cur.fetchall()
+                    for index_name, _ in index_definitions:
+                        cur.execute(f'DROP INDEX "{index_name}"')
                 
-                conn.commit()
-                logger.info(f"✅ Inserted {len(earnings_list)} earnings records")
-                return True
+                # COPY into the staging table, then merge with the prepared upsert;
+                # committing empties the staging table for the next batch
+                cur.copy_expert("COPY earnings_stg FROM STDIN WITH (FORMAT binary)", buffer)
+                cur.execute("EXECUTE merge_earnings")
+                
+                for _, index_definition in index_definitions:
+                    cur.execute(index_definition)
+            self.conn.commit()
+            
+            logger.info(f"✅ Inserted {len(earnings_list)} earnings records")
+            return True
                 
         except Exception as e:
+            self.conn.rollback()
             logger.error(f"❌ Failed to insert earnings data: {e}")
             return False
     
@@ -374,45 +667,54 @@ class EarningsDataIngestion:
             logger.error("No S&P 500 companies loaded")
             return False
         
-        logger.info(f"🚀 Starting earnings data ingestion for {min(limit, len(self.sp500_companies))} companies...")
+        total = min(limit, len(self.sp500_companies))
+        logger.info(f"🚀 Starting earnings data ingestion for {total} companies...")
         
         success_count = 0
         error_count = 0
         
-        for i, company in enumerate(self.sp500_companies[:limit]):
-            symbol = company.get('symbol')
-            if not symbol:
-                continue
-            
-            logger.info(f"📊 Processing {symbol} ({i+1}/{min(limit, len(self.sp500_companies))})")
-            
-            try:
-                # Fetch real earnings data (past)
-                real_earnings = self.fetch_earnings_data_alpha_vantage(symbol)
-                
-                # Generate future earnings data
-                future_earnings = self.generate_mock_future_earnings(symbol, company)
-                
-                # Combine all earnings
-                all_earnings = real_earnings + future_earnings
-                
-                if all_earnings:
-                    if self.insert_earnings_data(all_earnings):
-                        success_count += 1
-                        logger.info(f"✅ {symbol}: {len(real_earnings)} real + {len(future_earnings)} future earnings")
-                    else:
-                        error_count += 1
-                else:
-                    error_count += 1
-                    logger.warning(f"⚠️ No earnings data for {symbol}")
-                
-                # Rate limiting for API
-                if self.alpha_vantage_key != 'demo' and i % 5 == 0:
-                    await asyncio.sleep(12)  # Alpha Vantage: 5 calls per minute
-                
-            except Exception as e:
+        # The demo key is not throttled; real keys are held to their per-minute quota
+        semaphore = asyncio.Semaphore(ALPHA_VANTAGE_CONCURRENCY)
+        rate_limiter = (
+            AsyncRateLimiter(ALPHA_VANTAGE_CALLS_PER_MINUTE, 60)
+            if self.alpha_vantage_key != 'demo' else nullcontext()
+        )
+        
+        async def fetch_real_earnings(i: int, symbol: str) -> List[Dict]:
+            async with semaphore, rate_limiter:
+                logger.info(f"📊 Processing {symbol} ({i+1}/{total})")
+                return await asyncio.to_thread(self.fetch_earnings_data_alpha_vantage, symbol)
+        
+        companies = [company for company in self.sp500_companies[:limit] if company.get('symbol')]
+        
+        # Fetch real earnings data (past) for every company concurrently
+        real_results = await asyncio.gather(*(
+            fetch_real_earnings(i, company['symbol']) for i, company in enumerate(companies)
+        ))
+        
+        # Generate future earnings data for every company at once
+        future_results = self.generate_mock_future_earnings_bulk(
+            [company['symbol'] for company in companies], companies
+        )
+        
+        # Combine all earnings, then embed and insert them in bulk
+        all_earnings = []
+        fetched_symbols = []
+        for company, real_earnings, future_earnings in zip(companies, real_results, future_results):
+            symbol = company['symbol']
+            if real_earnings or future_earnings:
+                all_earnings.extend(real_earnings)
+                all_earnings.extend(future_earnings)
+                fetched_symbols.append(symbol)
+                logger.info(f"📥 {symbol}: {len(real_earnings)} real + {len(future_earnings)} future earnings")
+            else:
                 error_count += 1
-                logger.error(f"❌ Error processing {symbol}: {e}")
+                logger.warning(f"⚠️ No earnings data for {symbol}")
+        
+        if all_earnings and self.insert_earnings_data(all_earnings):
+            success_count = len(fetched_symbols)
+        else:
+            error_count += len(fetched_symbols)
         
         logger.info(f"🎉 Ingestion complete: {success_count} success, {error_count} errors")
         return success_count > 0
@@ -425,19 +727,22 @@ class EarningsDataIngestion:
         if not self.connect_to_database():
             return False
         
-        # Load S&P 500 companies
-        if not self.load_sp500_companies():
-            return False
-        
-        # Populate companies table
-        if not self.populate_companies_table():
-            return False
-        
-        # Ingest earnings data
-        await self.ingest_all_earnings_data(limit=50)  # Limit to 50 for demo
-        
-        logger.info("✅ Earnings data ingestion completed")
-        return True
+        try:
+            # Load S&P 500 companies
+            if not self.load_sp500_companies():
+                return False
+            
+            # Populate companies table
+            if not self.populate_companies_table():
+                return False
+            
+            # Ingest earnings data
+            await self.ingest_all_earnings_data(limit=50)  # Limit to 50 for demo
+            
+            logger.info("✅ Earnings data ingestion completed")
+            return True
+        finally:
+            self.conn.close()
 
 
 async def main():
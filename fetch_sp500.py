@@ -3,11 +3,31 @@
 Fetch S&P 500 companies data from Wikipedia and save to JSON
 """
 
+import re
 import requests
-import pandas as pd
+import lxml.html
 import json
 from datetime import datetime
 
+# Wikipedia table column -> company record field
+WIKIPEDIA_COLUMNS = {
+    'Symbol': 'symbol',
+    'Security': 'company_name',
+    'GICS Sector': 'gics_sector',
+    'GICS Sub-Industry': 'gics_sub_industry',
+    'Headquarters Location': 'headquarters',
+    'Date added': 'date_added',
+    'CIK': 'cik',
+    'Founded': 'founded'
+}
+
+WHITESPACE_RE = re.compile(r'[\r\n]+|\s{2,}')
+
+
+def _cell_text(cell):
+    """Cell text with line breaks and whitespace runs collapsed, as pandas.read_html reads it"""
+    return WHITESPACE_RE.sub(' ', cell.text_content()).strip()
+
 
 def fetch_sp500_from_wikipedia():
     """Fetch S&P 500 companies list from Wikipedia"""
@@ -16,35 +36,41 @@ def fetch_sp500_from_wikipedia():
     url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
     
     try:
-        # Read HTML tables from Wikipedia
-        tables = pd.read_html(url)
+        response = requests.get(url, headers={'User-Agent': 'calvin-sp500-fetch/1.0'}, timeout=30)
+        response.raise_for_status()
         
         # The first table contains the current S&P 500 companies
-        sp500_table = tables[0]
+        sp500_table = lxml.html.fromstring(response.content).xpath('//table[contains(@class, "wikitable")]')[0]
+        rows = sp500_table.xpath('.//tr')
         
         # Clean and standardize column names
-        sp500_table.columns = sp500_table.columns.str.strip()
+        columns = [_cell_text(cell) for cell in rows[0].xpath('./th')]
+        field_index = [
+            (field, columns.index(column) if column in columns else None)
+            for column, field in WIKIPEDIA_COLUMNS.items()
+        ]
         
-        print(f"Found {len(sp500_table)} S&P 500 companies")
-        print("Columns:", list(sp500_table.columns))
-        
-        # Convert to list of dictionaries
+        # Convert to list of dictionaries; missing columns become empty strings
+        last_updated = datetime.now().isoformat()
         companies_data = []
-        
-        for _, row in sp500_table.iterrows():
+        for row in rows[1:]:
+            cells = [_cell_text(cell) for cell in row.xpath('./td')]
+            if not cells:
+                continue
+            
             company_data = {
-                'symbol': str(row.get('Symbol', '')).strip(),
-                'company_name': str(row.get('Security', '')).strip(),
-                'gics_sector': str(row.get('GICS Sector', '')).strip(),
-                'gics_sub_industry': str(row.get('GICS Sub-Industry', '')).strip(),
-                'headquarters': str(row.get('Headquarters Location', '')).strip(),
-                'date_added': str(row.get('Date added', '')).strip(),
-                'cik': str(row.get('CIK', '')).strip(),
-                'founded': str(row.get('Founded', '')).strip() if 'Founded' in row else '',
-                'last_updated': datetime.now().isoformat()
+                field: cells[index] if index is not None and index < len(cells) else ''
+                for field, index in field_index
             }
+            # CIKs are stored without their zero padding
+            if company_data['cik'].isdigit():
+                company_data['cik'] = str(int(company_data['cik']))
+            company_data['last_updated'] = last_updated
             companies_data.append(company_data)
         
+        print(f"Found {len(companies_data)} S&P 500 companies")
+        print("Columns:", columns)
+        
         return companies_data
         
     except Exception as e: